@@ -1,40 +1,170 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash
+from flask import Flask, render_template, request, redirect, url_for, jsonify, flash, g, send_from_directory
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.utils import secure_filename
 import sqlite3
 from datetime import datetime, timedelta
 import os
+import re
 import json
-from database import DatabaseManager
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from database import DatabaseManager, RECEIPTS_DIR
 from ocr_processor import ReceiptProcessor
+from forms import (parse_form, TransactionForm, ReceiptForm, GoalForm, GoalProgressForm,
+                   GroupExpenseForm, BudgetLimitForm)
+
+# Try to import orjson for faster JSON encoding
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import flask-compress for compressed responses
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+class AppJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes sqlite3.Row query results as objects"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, sqlite3.Row):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+class OrjsonProvider(AppJSONProvider):
+    """JSON provider that encodes with orjson (C) instead of the json module"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype
+        )
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # Change this in production
+app.json = OrjsonProvider(app) if ORJSON_AVAILABLE else AppJSONProvider(app)
+if COMPRESS_AVAILABLE:
+    # Dashboard pages inline their chart data, so compress HTML and JSON
+    Compress(app)
 
 # Initialize database manager and OCR processor
 db = DatabaseManager()
 ocr_processor = ReceiptProcessor()
 
+# OCR runs on background threads so uploads don't block request workers.
+# Pending jobs are tracked by id until their result is collected, or
+# dropped OCR_JOB_TTL seconds after finishing if nobody collects it.
+ocr_executor = ThreadPoolExecutor(max_workers=2)
+ocr_jobs = {}
+OCR_JOB_TTL = 600
+
+# Uploaded receipt images are stored in RECEIPTS_DIR. It lives outside
+# static/ so images are served by the receipt_image route with long-lived
+# caching; receipt file names are unique and never overwritten.
+RECEIPT_MAX_AGE = 31536000  # one year
+
+# Month names for get_month_name, avoiding strptime/strftime per call
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December')
+
+# Splits a comma-separated participant list, trimming whitespace around names
+PARTICIPANTS_SPLIT_RE = re.compile(r'\s*,\s*')
+
 # -------------------------------
 # Helper functions
 # -------------------------------
 def get_currency():
-    """Get user's preferred currency"""
-    return db.get_currency()
+    """Get user's preferred currency, looked up at most once per request"""
+    if 'currency' not in g:
+        g.currency = db.get_currency()
+    return g.currency
+
+def get_budget_categories():
+    """Get budget categories, looked up at most once per request"""
+    if 'budget_categories' not in g:
+        g.budget_categories = db.get_budget_categories()
+    return g.budget_categories
+
+@app.context_processor
+def inject_globals():
+    """Provide currency and budget categories to every template"""
+    return {'currency': get_currency(),
+            'budget_categories': get_budget_categories()}
 
 def format_currency(amount):
     """Format amount with user's currency"""
     currency = get_currency()
     return f"{currency}{amount:.2f}"
 
+def snapshot_json(name, build):
+    """Serve an analytics API payload from a pre-encoded snapshot.
+
+    The JSON body is built and encoded once, then reused until a write
+    invalidates the analytics cache, so polling clients cost a dict lookup.
+    """
+    body = db.cached(('api_snapshot', name), lambda: app.json.dumps(build()))
+    return app.response_class(body, mimetype='application/json')
+
+def submit_ocr_job(func, file_path):
+    """Queue OCR processing of a saved receipt and return its job id"""
+    evict_stale_ocr_jobs()
+    job_id = uuid.uuid4().hex
+    job = {'future': ocr_executor.submit(func, file_path),
+           'file_path': file_path}
+    ocr_jobs[job_id] = job
+    job['future'].add_done_callback(lambda _: job.setdefault('finished_at', time.monotonic()))
+    return job_id
+
+def evict_stale_ocr_jobs():
+    """Drop finished jobs nobody collected within OCR_JOB_TTL, with their uploads"""
+    cutoff = time.monotonic() - OCR_JOB_TTL
+    for job_id, job in list(ocr_jobs.items()):
+        if job.get('finished_at', cutoff) < cutoff and ocr_jobs.pop(job_id, None) is not None:
+            # The receipt was never confirmed, so its image is unreferenced
+            try:
+                os.remove(job['file_path'])
+            except OSError:
+                pass
+
+def process_temp_receipt(file_path):
+    """Run OCR on a temporary upload and delete it afterwards"""
+    try:
+        return ocr_processor.process_receipt(file_path)
+    finally:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
 def get_current_month():
     """Get current month in YYYY-MM format"""
-    return datetime.now().strftime('%Y-%m')
+    now = datetime.now()
+    return f"{now.year:04d}-{now.month:02d}"
 
 def get_month_name(month_str):
     """Convert YYYY-MM to readable month name"""
     try:
-        date_obj = datetime.strptime(month_str, '%Y-%m')
-        return date_obj.strftime('%B %Y')
-    except:
+        year, month = int(month_str[:4]), int(month_str[5:7])
+        if len(month_str) != 7 or month_str[4] != '-' or not 1 <= month <= 12:
+            return month_str
+        return f"{MONTH_NAMES[month - 1]} {year}"
+    except (TypeError, ValueError, IndexError):
         return month_str
 
 # -------------------------------
@@ -44,100 +174,57 @@ def get_month_name(month_str):
 @app.route('/')
 def dashboard():
     """Main dashboard with charts and insights"""
-    # Get recent expenses
-    expenses = db.get_expenses(limit=10)
-    
-    # Get spending analytics
-    category_data = db.get_spending_by_category()
-    monthly_trends = db.get_monthly_trends(6)
-    mood_analysis = db.get_mood_analysis()
-    
-    # Get insights
-    insights = db.generate_insights()
-    
-    # Get current month spending
-    current_month = get_current_month()
-    current_month_expenses = db.get_expenses(
-        start_date=f"{current_month}-01",
-        end_date=f"{current_month}-31"
-    )
-    current_month_total = sum(exp['amount'] for exp in current_month_expenses)
-    
-    # Get budget categories
-    budget_categories = db.get_budget_categories()
+    # Load recent expenses, analytics, insights and budgets in one go
+    data = db.get_dashboard_bundle(get_current_month())
     
     # Get expense distribution for pie chart (only negative amounts)
-    expense_data = db.get_spending_by_category()
-    # Filter to only include negative amounts (expenses)
-    expense_categories = [item for item in expense_data if item['total'] < 0]
+    expense_categories = [item for item in data['category_data'] if item['total'] < 0]
     categories = [item['category'] for item in expense_categories]
     amounts = [abs(item['total']) for item in expense_categories]
     
     return render_template('index.html', 
-                         expenses=expenses,
-                         category_data=category_data,
-                         monthly_trends=monthly_trends,
-                         mood_analysis=mood_analysis,
-                         insights=insights,
-                         current_month_total=current_month_total,
-                         budget_categories=budget_categories,
+                         **data,
                          categories=categories,
-                         amounts=amounts,
-                         currency=get_currency())
+                         amounts=amounts)
 
 @app.route('/add')
 def add_expense_page():
     """Add expense page with mood tracking"""
-    budget_categories = db.get_budget_categories()
-    return render_template('add.html', 
-                         categories=[cat['category'] for cat in budget_categories],
-                         currency=get_currency())
+    return render_template('add.html')
 
 @app.route('/add_income', methods=['GET', 'POST'])
 def add_income():
     """Add income transaction"""
     if request.method == 'POST':
         try:
-            date = request.form['date']
-            category = request.form['category']
-            description = request.form['description']
-            amount = float(request.form['amount'])
+            form = parse_form(TransactionForm, request.form)
             
             # Add income to database (positive amount)
-            db.add_expense(date, category, description, amount)
+            db.add_expense(form.date, form.category, form.description, form.amount)
             flash(f'Income added successfully! 💰', 'success')
             return redirect(url_for('dashboard'))
         except Exception as e:
             flash(f'Error adding income: {str(e)}', 'error')
             return redirect(url_for('add_income'))
     
-    return render_template('add_income.html', 
-                         currency=get_currency())
+    return render_template('add_income.html')
 
 @app.route('/add_expense', methods=['GET', 'POST'])
 def add_expense():
     """Add expense transaction"""
     if request.method == 'POST':
         try:
-            date = request.form['date']
-            category = request.form['category']
-            description = request.form['description']
-            amount = float(request.form['amount'])
-            mood = request.form.get('mood', '😊')
+            form = parse_form(TransactionForm, request.form)
             
             # Add expense to database (negative amount)
-            db.add_expense(date, category, description, -amount, mood)
+            db.add_expense(form.date, form.category, form.description, -form.amount, form.mood)
             flash(f'Expense added successfully! 💰', 'success')
             return redirect(url_for('dashboard'))
         except Exception as e:
             flash(f'Error adding expense: {str(e)}', 'error')
             return redirect(url_for('add_expense'))
     
-    budget_categories = db.get_budget_categories()
-    return render_template('add.html', 
-                         categories=[cat['category'] for cat in budget_categories],
-                         currency=get_currency(),
-                         transaction_type='expense')
+    return render_template('add.html', transaction_type='expense')
 
 # The add_expense route has been moved to the new separate routes above
 
@@ -146,18 +233,14 @@ def edit_expense(expense_id):
     """Edit existing expense"""
     if request.method == 'POST':
         try:
-            date = request.form['date']
-            category = request.form['category']
-            description = request.form['description']
-            amount = float(request.form['amount'])
-            mood = request.form.get('mood', '😊')
+            form = parse_form(TransactionForm, request.form)
             
             success = db.update_expense(expense_id, 
-                                      date=date, 
-                                      category=category, 
-                                      description=description, 
-                                      amount=amount, 
-                                      mood=mood)
+                                      date=form.date, 
+                                      category=form.category, 
+                                      description=form.description, 
+                                      amount=form.amount, 
+                                      mood=form.mood)
             
             if success:
                 flash('Expense updated successfully! ✏️', 'success')
@@ -171,18 +254,13 @@ def edit_expense(expense_id):
             return redirect(url_for('edit_expense', expense_id=expense_id))
     
     # Get expense data for editing
-    expenses = db.get_expenses()
-    expense = next((exp for exp in expenses if exp['id'] == expense_id), None)
-    
+    expense = db.get_expense_by_id(expense_id)
+
     if not expense:
         flash('Expense not found!', 'error')
         return redirect(url_for('dashboard'))
     
-    budget_categories = db.get_budget_categories()
-    return render_template('edit.html', 
-                         expense=expense,
-                         categories=[cat['category'] for cat in budget_categories],
-                         currency=get_currency())
+    return render_template('edit.html', expense=expense)
 
 @app.route('/delete/<int:expense_id>')
 def delete_expense(expense_id):
@@ -206,28 +284,23 @@ def insights():
                          insights=insights,
                          category_data=category_data,
                          monthly_trends=monthly_trends,
-                         mood_analysis=mood_analysis,
-                         currency=get_currency())
+                         mood_analysis=mood_analysis)
 
 @app.route('/goals')
 def goals():
     """Savings goals page"""
     goals = db.get_savings_goals()
     return render_template('goals.html', 
-                         goals=goals,
-                         currency=get_currency())
+                         goals=goals)
 
 @app.route('/goals', methods=['POST'])
 def add_goal():
     """Add new savings goal"""
     try:
-        title = request.form['title']
-        target_amount = float(request.form['target_amount'])
-        deadline = request.form.get('deadline')
-        category = request.form.get('category', 'General')
+        form = parse_form(GoalForm, request.form)
         
-        goal_id = db.add_savings_goal(title, target_amount, deadline, category)
-        flash(f'Goal "{title}" created successfully! 🎯', 'success')
+        goal_id = db.add_savings_goal(form.title, form.target_amount, form.deadline, form.category)
+        flash(f'Goal "{form.title}" created successfully! 🎯', 'success')
         
     except Exception as e:
         flash(f'Error creating goal: {str(e)}', 'error')
@@ -238,11 +311,11 @@ def add_goal():
 def update_goal_progress(goal_id):
     """Update goal progress"""
     try:
-        amount = float(request.form['amount'])
-        success = db.update_goal_progress(goal_id, amount)
+        form = parse_form(GoalProgressForm, request.form)
+        success = db.update_goal_progress(goal_id, form.amount)
         
         if success:
-            flash(f'Added {get_currency()}{amount:.2f} to your goal! 💪', 'success')
+            flash(f'Added {get_currency()}{form.amount:.2f} to your goal! 💪', 'success')
         else:
             flash('Goal not found!', 'error')
             
@@ -262,35 +335,29 @@ def calendar():
     return render_template('calendar.html',
                          daily_spending=daily_spending,
                          year=year,
-                         month=month,
-                         currency=get_currency())
+                         month=month)
 
 @app.route('/group')
 def group_expenses():
     """Group expense splitter"""
     group_expenses = db.get_group_expenses()
     return render_template('group.html',
-                         group_expenses=group_expenses,
-                         currency=get_currency())
+                         group_expenses=group_expenses)
 
 @app.route('/group', methods=['POST'])
 def add_group_expense():
     """Add group expense"""
     try:
-        title = request.form['title']
-        total_amount = float(request.form['total_amount'])
-        participants = request.form['participants'].split(',')
-        participants = [p.strip() for p in participants if p.strip()]
-        paid_by = request.form['paid_by']
-        date = request.form['date']
-        description = request.form.get('description', '')
+        form = parse_form(GroupExpenseForm, request.form)
+        participants = [p for p in PARTICIPANTS_SPLIT_RE.split(form.participants.strip()) if p]
         
         if len(participants) < 2:
             flash('At least 2 participants required!', 'error')
             return redirect(url_for('group_expenses'))
         
-        expense_id = db.add_group_expense(title, total_amount, participants, paid_by, date, description)
-        flash(f'Group expense "{title}" created successfully! 👥', 'success')
+        expense_id = db.add_group_expense(form.title, form.total_amount, participants,
+                                          form.paid_by, form.date, form.description)
+        flash(f'Group expense "{form.title}" created successfully! 👥', 'success')
         
     except Exception as e:
         flash(f'Error creating group expense: {str(e)}', 'error')
@@ -311,60 +378,68 @@ def scan_receipt():
                 flash('No file selected!', 'error')
                 return redirect(url_for('scan_receipt'))
             
-            # Save temporary file
-            filename = f"receipt_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-            file_path = os.path.join('static', 'receipts', filename)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # Save under its final, collision-free name so confirming the
+            # receipt only has to record the path
+            filename = f"receipt_{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+            file_path = os.path.join(RECEIPTS_DIR, filename)
+            os.makedirs(RECEIPTS_DIR, exist_ok=True)
             file.save(file_path)
             
-            # Process with OCR
-            result = ocr_processor.process_receipt(file_path)
-            
-            if result['success']:
-                flash('Receipt processed successfully! Review and confirm the details below.', 'success')
-                return render_template('scan_receipt.html', 
-                                     extracted=result,
-                                     file_path=file_path,
-                                     currency=get_currency(),
-                                     budget_categories=db.get_budget_categories())
-            else:
-                flash(f'Error processing receipt: {result.get("error", "Unknown error")}', 'error')
-                # Clean up failed file
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-                return redirect(url_for('scan_receipt'))
+            # Process with OCR in the background
+            job_id = submit_ocr_job(ocr_processor.process_receipt, file_path)
+            return redirect(url_for('scan_receipt_result', job_id=job_id))
                 
         except Exception as e:
             flash(f'Error processing receipt: {str(e)}', 'error')
             return redirect(url_for('scan_receipt'))
     
-    return render_template('scan_receipt.html', 
-                         currency=get_currency(),
-                         budget_categories=db.get_budget_categories())
+    return render_template('scan_receipt.html')
+
+@app.route('/scan_receipt/<job_id>')
+def scan_receipt_result(job_id):
+    """Show the result of a receipt scan, or a progress page while it runs"""
+    job = ocr_jobs.get(job_id)
+    if job is None:
+        flash('Receipt scan not found!', 'error')
+        return redirect(url_for('scan_receipt'))
+    
+    if not job['future'].done():
+        return render_template('scan_receipt.html', 
+                             job_id=job_id)
+    
+    ocr_jobs.pop(job_id, None)
+    result = job['future'].result()
+    file_path = job['file_path']
+    
+    if result['success']:
+        flash('Receipt processed successfully! Review and confirm the details below.', 'success')
+        return render_template('scan_receipt.html', 
+                             extracted=result,
+                             file_path=file_path)
+    else:
+        flash(f'Error processing receipt: {result.get("error", "Unknown error")}', 'error')
+        # Clean up failed file
+        try:
+            os.remove(file_path)
+        except:
+            pass
+        return redirect(url_for('scan_receipt'))
 
 
 @app.route('/confirm_receipt', methods=['POST'])
 def confirm_receipt():
     """Confirm receipt data and add as expense"""
     try:
-        date = request.form['date']
-        amount = float(request.form['amount'])
-        category = request.form['category']
-        description = request.form['description']
-        file_path = request.form.get('file_path', '')
+        form = parse_form(ReceiptForm, request.form)
+        file_path = form.file_path
         
-        # Add expense to database
-        expense_id = db.add_expense(date, category, description, -amount, receipt_image=file_path)
+        # Only link images that scan_receipt saved into the receipts folder
+        if os.path.dirname(file_path) != RECEIPTS_DIR or not os.path.exists(file_path):
+            file_path = None
         
-        # Update file path to use expense ID
-        if file_path and os.path.exists(file_path):
-            new_filename = f"receipt_{expense_id}_{os.path.basename(file_path)}"
-            new_file_path = os.path.join('static', 'receipts', new_filename)
-            os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
-            os.rename(file_path, new_file_path)
-            db.update_expense(expense_id, receipt_image=new_file_path)
+        # Add expense to database
+        db.add_expense(form.date, form.category, form.description, -form.amount,
+                       receipt_image=file_path)
         
         flash(f'Expense added successfully from receipt! 💰', 'success')
         
@@ -373,34 +448,44 @@ def confirm_receipt():
     
     return redirect(url_for('dashboard'))
 
+@app.route('/receipts/<path:filename>')
+def receipt_image(filename):
+    """Serve an uploaded receipt image"""
+    return send_from_directory(os.path.abspath(RECEIPTS_DIR), filename,
+                               conditional=True, max_age=RECEIPT_MAX_AGE)
+
 # API endpoints for AJAX requests
 @app.route('/api/expenses')
 def api_expenses():
-    """API endpoint for expenses data"""
+    """API endpoint for expenses data
+    
+    Pass format=columnar to get one list per column instead of one object
+    per row, which is smaller and faster to encode for long date ranges.
+    """
     category = request.args.get('category')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    expenses = db.get_expenses(category=category, start_date=start_date, end_date=end_date)
+    if request.args.get('format') == 'columnar':
+        expenses = db.get_expenses_columnar(category=category, start_date=start_date, end_date=end_date)
+    else:
+        expenses = db.get_expenses(category=category, start_date=start_date, end_date=end_date)
     return jsonify(expenses)
 
 @app.route('/api/insights')
 def api_insights():
     """API endpoint for insights"""
-    insights = db.generate_insights()
-    return jsonify(insights)
+    return snapshot_json('insights', db.generate_insights)
 
 @app.route('/api/charts/category')
 def api_charts_category():
     """API endpoint for category spending chart"""
-    data = db.get_spending_by_category()
-    return jsonify(data)
+    return snapshot_json('category', db.get_spending_by_category)
 
 @app.route('/api/charts/monthly')
 def api_charts_monthly():
     """API endpoint for monthly trends chart"""
-    data = db.get_monthly_trends(12)
-    return jsonify(data)
+    return snapshot_json('monthly', lambda: db.get_monthly_trends(12))
 
 @app.route('/api/calendar/<int:year>/<int:month>')
 def api_calendar_data(year, month):
@@ -412,12 +497,7 @@ def api_calendar_data(year, month):
 def settings():
     """User settings page"""
     preferences = db.get_user_preferences()
-    budget_categories = db.get_budget_categories()
-    
-    return render_template('settings.html',
-                         preferences=preferences,
-                         budget_categories=budget_categories,
-                         currency=get_currency())
+    return render_template('settings.html', preferences=preferences)
 
 @app.route('/settings', methods=['POST'])
 def update_settings():
@@ -454,37 +534,42 @@ def process_receipt_ocr():
             return jsonify({'success': False, 'error': 'No file selected'})
         
         # Save temporary file
-        filename = f"temp_receipt_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-        file_path = os.path.join('static', 'receipts', filename)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        filename = f"temp_receipt_{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+        file_path = os.path.join(RECEIPTS_DIR, filename)
+        os.makedirs(RECEIPTS_DIR, exist_ok=True)
         file.save(file_path)
         
-        # Process with OCR
-        result = ocr_processor.process_receipt(file_path)
-        
-        # Clean up temporary file
-        try:
-            os.remove(file_path)
-        except:
-            pass
+        # Process with OCR in the background; the temporary file is
+        # removed once processing finishes
+        job_id = submit_ocr_job(process_temp_receipt, file_path)
         
-        return jsonify(result)
+        return jsonify({'success': True,
+                        'job_id': job_id,
+                        'status_url': url_for('ocr_job_status', job_id=job_id)}), 202
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/ocr/status/<job_id>')
+def ocr_job_status(job_id):
+    """API endpoint for polling a receipt OCR job"""
+    job = ocr_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    
+    if not job['future'].done():
+        return jsonify({'success': True, 'done': False})
+    
+    ocr_jobs.pop(job_id, None)
+    return jsonify({'success': True, 'done': True, 'result': job['future'].result()})
+
 @app.route('/api/budget/update', methods=['POST'])
 def update_budget_limit():
     """API endpoint for updating budget limits"""
     try:
-        data = request.get_json()
-        category = data.get('category')
-        limit = data.get('limit')
-        
-        if not category or limit is None:
-            return jsonify({'success': False, 'error': 'Missing required fields'})
+        form = parse_form(BudgetLimitForm, request.get_json() or {})
         
-        success = db.update_budget_limit(category, float(limit))
+        success = db.update_budget_limit(form.category, form.limit)
         
         if success:
             return jsonify({'success': True, 'message': 'Budget limit updated'})
@@ -495,7 +580,9 @@ def update_budget_limit():
         return jsonify({'success': False, 'error': str(e)})
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Debug mode (auto-reloader, template re-reads on every render) is opt-in
+    # via FLASK_DEBUG=1 so compiled templates stay cached by default
+    app.run(host="0.0.0.0", port=5000)
 
 
 
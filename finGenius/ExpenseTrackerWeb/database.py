@@ -3,43 +3,213 @@ Enhanced Database Module for Personal Expense Tracker
 Handles SQLite database connections and operations with mood tracking, goals, and insights
 """
 
+import logging
+import os
 import sqlite3
+import threading
+import time
+from functools import wraps, lru_cache
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
-import json
+from typing import List, Dict, Tuple, Optional, Iterator
+from itertools import product
+
+logger = logging.getLogger(__name__)
+
+
+def month_range(month: str) -> Tuple[str, str]:
+    """Get the half-open [start, end) date range covering a YYYY-MM month"""
+    year, mon = int(month[:4]), int(month[5:7])
+    if mon == 12:
+        year, mon = year + 1, 0
+    return f"{month}-01", f"{year:04d}-{mon + 1:02d}-01"
+
+
+def _build_expenses_queries() -> Dict[Tuple[bool, bool, bool, bool], str]:
+    """Build get_expenses SQL for every (category, start, end, limit) filter combination"""
+    queries = {}
+    for shape in product((False, True), repeat=4):
+        has_category, has_start, has_end, has_limit = shape
+        conditions = []
+        if has_category:
+            conditions.append("category = ?")
+        if has_start:
+            conditions.append("date >= ?")
+        if has_end:
+            conditions.append("date <= ?")
+        
+        query = "SELECT * FROM expenses"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY date DESC"
+        if has_limit:
+            query += " LIMIT ?"
+        queries[shape] = query
+    return queries
+
+
+# Fixed SQL text per filter combination, so SQLite's statement cache reuses
+# the prepared statement instead of parsing a freshly built string
+EXPENSES_QUERIES = _build_expenses_queries()
+
+
+# Columns each dynamic UPDATE may set
+EXPENSE_UPDATE_FIELDS = frozenset({'date', 'category', 'description', 'amount', 'mood', 'receipt_image'})
+PREFERENCE_UPDATE_FIELDS = frozenset({'theme', 'currency', 'budget_alerts', 'insights_enabled'})
+
+
+@lru_cache(maxsize=None)
+def _update_query(table: str, fields: Tuple[str, ...]) -> str:
+    """Build the UPDATE statement setting the given (sorted) fields of one row by id"""
+    set_clause = ', '.join(f"{field} = ?" for field in fields)
+    return f"UPDATE {table} SET {set_clause} WHERE id = ?"
+
+
+def months_ago_start(months: int) -> str:
+    """Get the first day (YYYY-MM-DD) of the month `months` months before the current one"""
+    today = datetime.now()
+    month_index = today.year * 12 + today.month - 1 - months
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}-01"
+
+
+# Schema version stored in PRAGMA user_version; bump it when adding a
+# migration to init_database
+SCHEMA_VERSION = 3
+
+# Directory receipt images are uploaded to, relative to the app directory.
+# Images were saved under static/receipts/ before schema version 3, which
+# moves them (and the paths stored in expenses.receipt_image) across.
+RECEIPTS_DIR = 'receipts'
+LEGACY_RECEIPTS_DIR = 'static/receipts'
+
+# Bounds covering every valid YYYY-MM-DD date, bound in place of a missing filter
+MIN_DATE = '0000-01-01'
+MAX_DATE = '9999-12-31'
+
+# Date formats older rows may have been saved in, rewritten to YYYY-MM-DD
+# when migrating to the CHECKed date columns
+LEGACY_DATE_FORMATS = ('%Y/%m/%d', '%Y.%m.%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y',
+                       '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S')
+
+# Table definitions that migrations rebuild from, formatted with the table
+# name. Dates are checked to be YYYY-MM-DD so text order is date order.
+EXPENSES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL CHECK (date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'),
+        category TEXT NOT NULL,
+        description TEXT,
+        amount REAL NOT NULL,
+        mood TEXT DEFAULT '😊',
+        receipt_image TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+GROUP_EXPENSES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        total_amount REAL NOT NULL,
+        paid_by TEXT NOT NULL,
+        date TEXT NOT NULL CHECK (date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'),
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+# Single-row settings table looked up by id, so it needs no separate rowid
+USER_PREFERENCES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY DEFAULT 1,
+        theme TEXT DEFAULT 'pastel',
+        currency TEXT DEFAULT '₹',
+        budget_alerts INTEGER DEFAULT 1 CHECK (budget_alerts IN (0, 1)),
+        insights_enabled INTEGER DEFAULT 1 CHECK (insights_enabled IN (0, 1)),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+'''
+
+# Indexes for the date range, category and mood filters/aggregates.
+# (date, amount, category) also covers date-only lookups, so no separate
+# single-column date index is needed.
+EXPENSE_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_expenses_date_amount ON expenses(date, amount, category)',
+    'CREATE INDEX IF NOT EXISTS idx_expenses_cat_date ON expenses(category, date, amount)',
+    'CREATE INDEX IF NOT EXISTS idx_expenses_mood ON expenses(mood, amount)',
+)
+
+
+# Seconds a cached analytics result may be served before it is recomputed.
+# Writes through DatabaseManager invalidate the cache immediately; the TTL
+# only bounds staleness from writes made by other processes.
+ANALYTICS_CACHE_TTL = 60
+
+
+def cached_analytics(method):
+    """Memoize an analytics getter per arguments until the cache is invalidated"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self.cached(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
 
 class DatabaseManager:
     def __init__(self, db_path: str = 'expenses.db'):
         self.db_path = db_path
+        self._local = threading.local()
+        self._cache = {}
+        self._currency = None
         self.init_database()
     
     def get_connection(self):
-        """Get database connection with row factory for easier data handling"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Get this thread's database connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers proceed while a write is in progress
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA cache_size=-65536')
+            conn.execute('PRAGMA mmap_size=268435456')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
         return conn
+
+    def close(self):
+        """Close this thread's database connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    def cached(self, key, compute):
+        """Get a cached analytics value, computing it if missing or expired"""
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < ANALYTICS_CACHE_TTL:
+            return entry[1]
+        value = compute()
+        self._cache[key] = (now, value)
+        return value
+
+    def invalidate_analytics_cache(self):
+        """Drop cached analytics so the next read reflects the latest writes"""
+        self._cache.clear()
     
     def init_database(self):
         """Initialize all database tables with enhanced schema"""
         conn = self.get_connection()
-        cursor = conn.cursor()
+        is_new = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'expenses'").fetchone() is None
+        schema_version = SCHEMA_VERSION if is_new else conn.execute('PRAGMA user_version').fetchone()[0]
         
         # Enhanced expenses table with mood tracking
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                category TEXT NOT NULL,
-                description TEXT,
-                amount REAL NOT NULL,
-                mood TEXT DEFAULT '😊',
-                receipt_image TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        conn.execute(EXPENSES_TABLE.format(table='expenses'))
         
         # Savings goals table for gamification
-        cursor.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS savings_goals (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 title TEXT NOT NULL,
@@ -53,34 +223,38 @@ class DatabaseManager:
         ''')
         
         # Group expenses for splitting functionality
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS group_expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                total_amount REAL NOT NULL,
-                participants TEXT NOT NULL,
-                split_amount REAL NOT NULL,
-                paid_by TEXT NOT NULL,
-                date TEXT NOT NULL,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        conn.execute(GROUP_EXPENSES_TABLE.format(table='group_expenses'))
+        
+        # One row per participant of a group expense, in entry order
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS group_expense_participants (
+                group_id INTEGER NOT NULL REFERENCES group_expenses(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                PRIMARY KEY (group_id, position)
             )
         ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_group_participants_name ON group_expense_participants(name)')
+        
+        # Older databases stored participants as a JSON array column on
+        # group_expenses; move them into the child table and drop the column
+        group_columns = [row['name'] for row in conn.execute('PRAGMA table_info(group_expenses)')]
+        if 'participants' in group_columns:
+            conn.execute('''
+                INSERT OR IGNORE INTO group_expense_participants (group_id, position, name)
+                SELECT g.id, p.key, p.value
+                FROM group_expenses g, json_each(g.participants) p
+            ''')
+            conn.execute('ALTER TABLE group_expenses DROP COLUMN participants')
+        # The per-person split is now derived from the participant count
+        if 'split_amount' in group_columns:
+            conn.execute('ALTER TABLE group_expenses DROP COLUMN split_amount')
         
         # User preferences for themes and settings
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_preferences (
-                id INTEGER PRIMARY KEY DEFAULT 1,
-                theme TEXT DEFAULT 'pastel',
-                currency TEXT DEFAULT '₹',
-                budget_alerts BOOLEAN DEFAULT 1,
-                insights_enabled BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        conn.execute(USER_PREFERENCES_TABLE.format(table='user_preferences'))
         
         # Budget categories with limits
-        cursor.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS budget_categories (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 category TEXT UNIQUE NOT NULL,
@@ -90,6 +264,9 @@ class DatabaseManager:
             )
         ''')
         
+        for index_sql in EXPENSE_INDEXES:
+            conn.execute(index_sql)
+        
         # Insert default budget categories
         default_categories = [
             ('Food & Dining', 5000, '#FFD1DC'),
@@ -102,192 +279,282 @@ class DatabaseManager:
             ('Others', 2000, '#D3D3D3')
         ]
         
-        for category, limit, color in default_categories:
-            cursor.execute('''
-                INSERT OR IGNORE INTO budget_categories (category, monthly_limit, color)
-                VALUES (?, ?, ?)
-            ''', (category, limit, color))
+        values_clause = ", ".join(["(?, ?, ?)"] * len(default_categories))
+        conn.execute(f'''
+            INSERT OR IGNORE INTO budget_categories (category, monthly_limit, color)
+            VALUES {values_clause}
+        ''', [value for row in default_categories for value in row])
         
         # Insert default user preferences
-        cursor.execute('''
+        conn.execute('''
             INSERT OR IGNORE INTO user_preferences (id, theme, currency, budget_alerts, insights_enabled)
             VALUES (1, 'pastel', '₹', 1, 1)
         ''')
         
         conn.commit()
-        conn.close()
+        
+        if schema_version < 2:
+            self._migrate_table_definitions(conn)
+        if schema_version < 3:
+            self._move_legacy_receipts(conn)
+        
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    def _migrate_table_definitions(self, conn):
+        """Rebuild tables created before the current column types and CHECK constraints"""
+        # Foreign keys are off (outside any transaction, as SQLite requires)
+        # so dropping the old group_expenses does not cascade into participants
+        conn.execute('PRAGMA foreign_keys=OFF')
+        try:
+            with conn:
+                conn.execute('BEGIN')
+                self._fix_legacy_dates(conn, 'expenses')
+                self._fix_legacy_dates(conn, 'group_expenses', child_table='group_expense_participants')
+                self._rebuild_table(conn, 'expenses', EXPENSES_TABLE)
+                self._rebuild_table(conn, 'group_expenses', GROUP_EXPENSES_TABLE)
+                self._rebuild_table(conn, 'user_preferences', USER_PREFERENCES_TABLE)
+                # Dropping the old expenses table dropped its indexes too
+                for index_sql in EXPENSE_INDEXES:
+                    conn.execute(index_sql)
+        finally:
+            conn.execute('PRAGMA foreign_keys=ON')
+    
+    def _move_legacy_receipts(self, conn):
+        """Move receipt images linked from expenses out of static/receipts/ into RECEIPTS_DIR"""
+        rows = conn.execute('SELECT id, receipt_image FROM expenses WHERE receipt_image IS NOT NULL').fetchall()
+        with conn:
+            for row in rows:
+                # Paths saved on Windows use backslashes
+                old_path = row['receipt_image'].replace('\\', '/')
+                if os.path.dirname(old_path) != LEGACY_RECEIPTS_DIR:
+                    continue
+                new_path = os.path.join(RECEIPTS_DIR, os.path.basename(old_path))
+                if os.path.exists(old_path):
+                    try:
+                        os.makedirs(RECEIPTS_DIR, exist_ok=True)
+                        os.replace(old_path, new_path)
+                    except OSError as e:
+                        logger.warning("Could not move receipt %s to %s: %s", old_path, RECEIPTS_DIR, e)
+                        continue
+                conn.execute('UPDATE expenses SET receipt_image = ? WHERE id = ?', (new_path, row['id']))
+    
+    def _fix_legacy_dates(self, conn, table: str, child_table: str = None):
+        """Rewrite dates that would fail the YYYY-MM-DD CHECK, moving unparseable rows to {table}_invalid_dates"""
+        invalid_ids = []
+        rows = conn.execute(f'''
+            SELECT id, date FROM {table}
+            WHERE date IS NULL OR date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+        ''').fetchall()
+        for row in rows:
+            for fmt in LEGACY_DATE_FORMATS:
+                try:
+                    fixed = datetime.strptime(str(row['date']).strip(), fmt).strftime('%Y-%m-%d')
+                except ValueError:
+                    continue
+                conn.execute(f'UPDATE {table} SET date = ? WHERE id = ?', (fixed, row['id']))
+                break
+            else:
+                invalid_ids.append(row['id'])
+        
+        if not invalid_ids:
+            return
+        # Keep the rows (and their children) aside rather than failing the
+        # migration, so they can be corrected and re-entered by hand
+        placeholders = ', '.join('?' * len(invalid_ids))
+        moves = [(table, 'id')] + ([(child_table, 'group_id')] if child_table else [])
+        for source, key in moves:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {source}_invalid_dates AS SELECT * FROM {source} WHERE 0')
+            conn.execute(f'INSERT INTO {source}_invalid_dates SELECT * FROM {source} WHERE {key} IN ({placeholders})',
+                         invalid_ids)
+            conn.execute(f'DELETE FROM {source} WHERE {key} IN ({placeholders})', invalid_ids)
+        logger.warning("Moved %d %s row(s) with unreadable dates to %s_invalid_dates: ids %s",
+                       len(invalid_ids), table, table, invalid_ids)
+    
+    def _rebuild_table(self, conn, table: str, create_sql: str):
+        """Recreate a table from a new definition, copying over the columns it keeps"""
+        new_table = f"{table}_new"
+        conn.execute(f'DROP TABLE IF EXISTS {new_table}')
+        conn.execute(create_sql.format(table=new_table))
+        
+        new_columns = {row['name'] for row in conn.execute(f'PRAGMA table_info({new_table})')}
+        columns = ', '.join(row['name'] for row in conn.execute(f'PRAGMA table_info({table})')
+                            if row['name'] in new_columns)
+        conn.execute(f'INSERT INTO {new_table} ({columns}) SELECT {columns} FROM {table}')
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {new_table} RENAME TO {table}')
     
     # Expense operations
     def add_expense(self, date: str, category: str, description: str, amount: float, 
                    mood: str = '😊', receipt_image: str = None) -> int:
         """Add a new expense with mood tracking"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO expenses (date, category, description, amount, mood, receipt_image)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (date, category, description, amount, mood, receipt_image))
-        
-        expense_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO expenses (date, category, description, amount, mood, receipt_image)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (date, category, description, amount, mood, receipt_image))
+            
+            expense_id = cursor.lastrowid
+        self.invalidate_analytics_cache()
         return expense_id
     
-    def get_expenses(self, limit: int = None, category: str = None, 
-                    start_date: str = None, end_date: str = None) -> List[Dict]:
-        """Get expenses with optional filtering"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM expenses WHERE 1=1"
-        params = []
+    def add_expenses_bulk(self, rows: List[Tuple]) -> int:
+        """
+        Add many expenses in a single transaction
         
-        if category:
-            query += " AND category = ?"
-            params.append(category)
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
+        Args:
+            rows: (date, category, description, amount, mood, receipt_image) tuples
             
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date DESC"
-        
-        if limit:
-            query += " LIMIT ?"
-            params.append(limit)
-        
-        cursor.execute(query, params)
-        expenses = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return expenses
+        Returns:
+            Number of rows inserted
+        """
+        with self.get_connection() as conn:
+            cursor = conn.executemany('''
+                INSERT INTO expenses (date, category, description, amount, mood, receipt_image)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            
+            inserted = cursor.rowcount
+        self.invalidate_analytics_cache()
+        return inserted
     
+    def _expenses_query(self, limit: int = None, category: str = None,
+                        start_date: str = None, end_date: str = None) -> Tuple[str, List]:
+        """Get the filtered expenses query and its parameters"""
+        filters = (category, start_date, end_date, limit)
+        shape = tuple(bool(value) for value in filters)
+        return EXPENSES_QUERIES[shape], [value for value in filters if value]
+
+    def iter_expenses(self, limit: int = None, category: str = None,
+                      start_date: str = None, end_date: str = None,
+                      batch_size: int = 500) -> Iterator[sqlite3.Row]:
+        """Yield expenses with optional filtering, fetching them in batches"""
+        conn = self.get_connection()
+        cursor = conn.execute(*self._expenses_query(limit, category, start_date, end_date))
+        while batch := cursor.fetchmany(batch_size):
+            yield from batch
+
+    def get_expenses(self, limit: int = None, category: str = None, 
+                    start_date: str = None, end_date: str = None) -> List[sqlite3.Row]:
+        """Get expenses with optional filtering"""
+        return list(self.iter_expenses(limit, category, start_date, end_date))
+
+    def get_expenses_columnar(self, limit: int = None, category: str = None,
+                              start_date: str = None, end_date: str = None) -> Dict[str, List]:
+        """Get expenses with optional filtering as a column name -> values mapping"""
+        conn = self.get_connection()
+        cursor = conn.execute(*self._expenses_query(limit, category, start_date, end_date))
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        values = zip(*rows) if rows else ([] for _ in columns)
+        return {column: list(column_values) for column, column_values in zip(columns, values)}
+
+    def get_month_total(self, month: str) -> float:
+        """Get the net total of all transactions in a YYYY-MM month"""
+        start_date, end_date = month_range(month)
+        conn = self.get_connection()
+        cursor = conn.execute('''
+            SELECT COALESCE(SUM(amount), 0) FROM expenses
+            WHERE date >= ? AND date < ?
+        ''', (start_date, end_date))
+        total = cursor.fetchone()[0]
+        return total
+
+    def get_expense_by_id(self, expense_id: int) -> Optional[sqlite3.Row]:
+        """Get a single expense by its primary key"""
+        conn = self.get_connection()
+        cursor = conn.execute("SELECT * FROM expenses WHERE id = ? LIMIT 1", (expense_id,))
+        return cursor.fetchone()
+
     def update_expense(self, expense_id: int, **kwargs) -> bool:
         """Update expense fields"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Build dynamic update query
-        set_clauses = []
-        params = []
-        
-        for field, value in kwargs.items():
-            if field in ['date', 'category', 'description', 'amount', 'mood', 'receipt_image']:
-                set_clauses.append(f"{field} = ?")
-                params.append(value)
-        
-        if not set_clauses:
+        fields = tuple(sorted(EXPENSE_UPDATE_FIELDS.intersection(kwargs)))
+        if not fields:
             return False
         
+        params = [kwargs[field] for field in fields]
         params.append(expense_id)
-        query = f"UPDATE expenses SET {', '.join(set_clauses)} WHERE id = ?"
-        
-        cursor.execute(query, params)
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.execute(_update_query('expenses', fields), params)
+            success = cursor.rowcount > 0
+        self.invalidate_analytics_cache()
         return success
     
     def delete_expense(self, expense_id: int) -> bool:
         """Delete an expense"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+            success = cursor.rowcount > 0
+        self.invalidate_analytics_cache()
         return success
     
-    def execute(self, query: str, params=None):
+    def execute(self, query: str, params=()):
         """Execute a raw SQL query"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        return cursor
-    
-    def commit(self):
-        """Commit the current transaction"""
-        # This is handled automatically in each method, but added for compatibility
-        pass
+        return self.get_connection().execute(query, params)
     
     # Analytics and insights
-    def get_spending_by_category(self, start_date: str = None, end_date: str = None) -> List[Dict]:
+    @cached_analytics
+    def get_spending_by_category(self, start_date: str = None, end_date: str = None) -> List[sqlite3.Row]:
         """Get spending breakdown by category"""
         conn = self.get_connection()
-        cursor = conn.cursor()
         
+        # Missing bounds are bound as the widest possible dates, so the SQL
+        # text never changes and the range stays usable by the date index
         query = '''
             SELECT category, SUM(amount) as total, COUNT(*) as count,
-                   AVG(amount) as average, mood
-            FROM expenses WHERE 1=1
+                   AVG(amount) as average
+            FROM expenses
+            WHERE date >= ? AND date <= ?
+            GROUP BY category
+            ORDER BY total DESC
         '''
-        params = []
         
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-            
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " GROUP BY category ORDER BY total DESC"
-        
-        cursor.execute(query, params)
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        cursor = conn.execute(query, (start_date or MIN_DATE, end_date or MAX_DATE))
+        results = cursor.fetchall()
         return results
     
-    def get_monthly_trends(self, months: int = 6) -> List[Dict]:
-        """Get monthly spending trends"""
+    @cached_analytics
+    def get_monthly_trends(self, months: int = 6) -> List[sqlite3.Row]:
+        """Get monthly spending trends for the current month and the previous ones"""
         conn = self.get_connection()
-        cursor = conn.cursor()
+        
+        # Cutoff computed here so the filter is a plain range on the
+        # indexed date column
+        start_date = months_ago_start(months)
         
         query = '''
-            SELECT strftime('%Y-%m', date) as month,
+            SELECT substr(date, 1, 7) as month,
                    SUM(amount) as total,
                    COUNT(*) as count
             FROM expenses 
-            WHERE date >= date('now', '-{} months')
-            GROUP BY strftime('%Y-%m', date)
+            WHERE date >= ?
+            GROUP BY substr(date, 1, 7)
             ORDER BY month
-        '''.format(months)
+        '''
         
-        cursor.execute(query)
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        cursor = conn.execute(query, (start_date,))
+        results = cursor.fetchall()
         return results
     
-    def get_daily_spending(self, year: int, month: int) -> List[Dict]:
+    def get_daily_spending(self, year: int, month: int) -> List[sqlite3.Row]:
         """Get daily spending for calendar heatmap"""
         conn = self.get_connection()
-        cursor = conn.cursor()
         
         query = '''
             SELECT date, SUM(amount) as total, COUNT(*) as count
             FROM expenses 
-            WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ?
+            WHERE date >= ? AND date < ?
             GROUP BY date
             ORDER BY date
         '''
         
-        cursor.execute(query, (str(year), f"{month:02d}"))
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        cursor = conn.execute(query, month_range(f"{year:04d}-{month:02d}"))
+        results = cursor.fetchall()
         return results
     
-    def get_mood_analysis(self) -> Dict:
-        """Analyze spending patterns by mood"""
+    @cached_analytics
+    def get_mood_analysis(self, category: str = None) -> List[sqlite3.Row]:
+        """Analyze spending patterns by mood, optionally within one category"""
         conn = self.get_connection()
-        cursor = conn.cursor()
         
         query = '''
             SELECT mood, 
@@ -295,23 +562,39 @@ class DatabaseManager:
                    SUM(amount) as total,
                    AVG(amount) as average
             FROM expenses 
+            {}
             GROUP BY mood
             ORDER BY total DESC
-        '''
+        '''.format("WHERE category = ?" if category else "")
         
-        cursor.execute(query)
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        cursor = conn.execute(query, (category,) if category else ())
+        results = cursor.fetchall()
         return results
     
+    def get_dashboard_bundle(self, month: str) -> Dict:
+        """Get everything the dashboard renders in one call"""
+        return {
+            'expenses': self.get_expenses(limit=10),
+            'category_data': self.get_spending_by_category(),
+            'monthly_trends': self.get_monthly_trends(6),
+            'mood_analysis': self.get_mood_analysis(),
+            'insights': self.generate_insights(),
+            'current_month_total': self.get_month_total(month),
+            'budget_categories': self.get_budget_categories(),
+        }
+    
     # AI-powered insights generation
+    @cached_analytics
     def generate_insights(self) -> List[str]:
         """Generate AI-like spending insights based on data patterns"""
         insights = []
         
-        # Get recent spending data
-        recent_expenses = self.get_expenses(limit=50)
-        if not recent_expenses:
+        # The aggregates below are the cached getters the dashboard also uses,
+        # so on a warm cache this existence check is the only query besides
+        # the budget alerts
+        conn = self.get_connection()
+        has_expenses = conn.execute('SELECT EXISTS(SELECT 1 FROM expenses)').fetchone()[0]
+        if not has_expenses:
             return ["No expenses found. Start tracking to get insights! 💡"]
         
         # Category analysis
@@ -320,11 +603,22 @@ class DatabaseManager:
             top_category = category_data[0]
             insights.append(f"Your biggest spending category is {top_category['category']} at {top_category['total']:.0f} {self.get_currency()}")
         
-        # Monthly comparison
-        monthly_trends = self.get_monthly_trends(2)
-        if len(monthly_trends) >= 2:
-            current_month = monthly_trends[-1]['total']
-            previous_month = monthly_trends[-2]['total']
+        # Monthly comparison: latest month's total next to the month before it
+        latest = conn.execute('''
+            WITH monthly AS (
+                SELECT substr(date, 1, 7) as month, SUM(amount) as total
+                FROM expenses
+                WHERE date >= ?
+                GROUP BY month
+            )
+            SELECT total, LAG(total) OVER (ORDER BY month) as previous
+            FROM monthly
+            ORDER BY month DESC
+            LIMIT 1
+        ''', (months_ago_start(2),)).fetchone()
+        if latest is not None and latest['previous'] is not None:
+            current_month = latest['total']
+            previous_month = latest['previous']
             if current_month > previous_month:
                 increase = ((current_month - previous_month) / previous_month) * 100
                 insights.append(f"Spending increased by {increase:.1f}% compared to last month 📈")
@@ -339,18 +633,21 @@ class DatabaseManager:
             if happy_spending:
                 insights.append(f"You spent {happy_spending['total']:.0f} {self.get_currency()} on happy moments! 😊")
         
-        # Budget alerts
-        budget_categories = self.get_budget_categories()
-        current_month = datetime.now().strftime('%Y-%m')
-        for category in budget_categories:
-            if category['monthly_limit']:
-                category_expenses = self.get_spending_by_category(
-                    start_date=f"{current_month}-01",
-                    end_date=f"{current_month}-31"
-                )
-                category_total = next((item['total'] for item in category_expenses if item['category'] == category['category']), 0)
-                if category_total > category['monthly_limit'] * 0.8:
-                    insights.append(f"⚠️ You've used {category_total/category['monthly_limit']*100:.0f}% of your {category['category']} budget!")
+        # Budget alerts: month-to-date totals for every limited category in one query
+        now = datetime.now()
+        start_date, end_date = month_range(f"{now.year:04d}-{now.month:02d}")
+        cursor = conn.execute('''
+            SELECT bc.category, bc.monthly_limit, COALESCE(SUM(e.amount), 0) as total
+            FROM budget_categories bc
+            LEFT JOIN expenses e
+              ON e.category = bc.category AND e.date >= ? AND e.date < ?
+            WHERE bc.monthly_limit IS NOT NULL AND bc.monthly_limit != 0
+            GROUP BY bc.category
+            HAVING total > bc.monthly_limit * 0.8
+            ORDER BY bc.category
+        ''', (start_date, end_date))
+        for row in cursor.fetchall():
+            insights.append(f"⚠️ You've used {row['total']/row['monthly_limit']*100:.0f}% of your {row['category']} budget!")
         
         return insights[:5]  # Return top 5 insights
     
@@ -358,149 +655,132 @@ class DatabaseManager:
     def add_savings_goal(self, title: str, target_amount: float, deadline: str = None, 
                         category: str = None) -> int:
         """Add a new savings goal"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO savings_goals (title, target_amount, deadline, category)
-            VALUES (?, ?, ?, ?)
-        ''', (title, target_amount, deadline, category))
-        
-        goal_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO savings_goals (title, target_amount, deadline, category)
+                VALUES (?, ?, ?, ?)
+            ''', (title, target_amount, deadline, category))
+            
+            goal_id = cursor.lastrowid
         return goal_id
     
-    def get_savings_goals(self, status: str = 'active') -> List[Dict]:
+    def get_savings_goals(self, status: str = 'active') -> List[sqlite3.Row]:
         """Get savings goals"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        cursor = conn.execute('''
             SELECT * FROM savings_goals 
             WHERE status = ? 
             ORDER BY created_at DESC
         ''', (status,))
         
-        goals = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        goals = cursor.fetchall()
         return goals
     
     def update_goal_progress(self, goal_id: int, amount: float) -> bool:
         """Update goal progress by adding amount"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE savings_goals 
-            SET current_amount = current_amount + ? 
-            WHERE id = ?
-        ''', (amount, goal_id))
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                UPDATE savings_goals 
+                SET current_amount = current_amount + ? 
+                WHERE id = ?
+            ''', (amount, goal_id))
+            
+            success = cursor.rowcount > 0
         return success
     
     # Group expenses
     def add_group_expense(self, title: str, total_amount: float, participants: List[str], 
                          paid_by: str, date: str, description: str = None) -> int:
-        """Add a group expense and calculate splits"""
-        split_amount = total_amount / len(participants)
-        participants_json = json.dumps(participants)
-        
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO group_expenses (title, total_amount, participants, split_amount, paid_by, date, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (title, total_amount, participants_json, split_amount, paid_by, date, description))
-        
-        expense_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        """Add a group expense; the per-person split is derived when reading"""
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO group_expenses (title, total_amount, paid_by, date, description)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (title, total_amount, paid_by, date, description))
+            
+            expense_id = cursor.lastrowid
+            conn.executemany('''
+                INSERT INTO group_expense_participants (group_id, position, name)
+                VALUES (?, ?, ?)
+            ''', [(expense_id, position, name) for position, name in enumerate(participants)])
         return expense_id
     
     def get_group_expenses(self) -> List[Dict]:
         """Get all group expenses"""
         conn = self.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM group_expenses ORDER BY date DESC')
+        participants = {}
+        cursor = conn.execute('''
+            SELECT group_id, name FROM group_expense_participants
+            ORDER BY group_id, position
+        ''')
+        for group_id, name in cursor.fetchall():
+            participants.setdefault(group_id, []).append(name)
+        
+        cursor = conn.execute('''
+            SELECT g.*, g.total_amount / COUNT(p.group_id) as split_amount
+            FROM group_expenses g
+            LEFT JOIN group_expense_participants p ON p.group_id = g.id
+            GROUP BY g.id
+            ORDER BY g.date DESC
+        ''')
         expenses = []
         for row in cursor.fetchall():
             expense = dict(row)
-            expense['participants'] = json.loads(expense['participants'])
+            expense['participants'] = participants.get(expense['id'], [])
             expenses.append(expense)
         
-        conn.close()
         return expenses
     
     # Budget management
-    def get_budget_categories(self) -> List[Dict]:
+    @cached_analytics
+    def get_budget_categories(self) -> List[sqlite3.Row]:
         """Get budget categories with limits"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM budget_categories ORDER BY category')
-        categories = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        cursor = conn.execute('SELECT * FROM budget_categories ORDER BY category')
+        categories = cursor.fetchall()
         return categories
     
     def update_budget_limit(self, category: str, limit: float) -> bool:
         """Update budget limit for a category"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE budget_categories 
-            SET monthly_limit = ? 
-            WHERE category = ?
-        ''', (limit, category))
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                UPDATE budget_categories 
+                SET monthly_limit = ? 
+                WHERE category = ?
+            ''', (limit, category))
+            
+            success = cursor.rowcount > 0
+        self.invalidate_analytics_cache()
         return success
     
     # User preferences
     def get_user_preferences(self) -> Dict:
         """Get user preferences"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM user_preferences WHERE id = 1')
+        cursor = conn.execute('SELECT * FROM user_preferences WHERE id = 1')
         result = cursor.fetchone()
-        conn.close()
         
         return dict(result) if result else {}
     
     def update_user_preferences(self, **kwargs) -> bool:
         """Update user preferences"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        set_clauses = []
-        params = []
-        
-        for field, value in kwargs.items():
-            if field in ['theme', 'currency', 'budget_alerts', 'insights_enabled']:
-                set_clauses.append(f"{field} = ?")
-                params.append(value)
-        
-        if not set_clauses:
+        fields = tuple(sorted(PREFERENCE_UPDATE_FIELDS.intersection(kwargs)))
+        if not fields:
             return False
         
-        query = f"UPDATE user_preferences SET {', '.join(set_clauses)} WHERE id = 1"
-        cursor.execute(query, params)
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        params = [kwargs[field] for field in fields]
+        params.append(1)
+        with self.get_connection() as conn:
+            cursor = conn.execute(_update_query('user_preferences', fields), params)
+            success = cursor.rowcount > 0
+        self._currency = None
+        self.invalidate_analytics_cache()
         return success
     
     def get_currency(self) -> str:
-        """Get user's preferred currency"""
-        prefs = self.get_user_preferences()
-        return prefs.get('currency', '₹')
+        """Get user's preferred currency, cached until preferences change"""
+        if self._currency is None:
+            prefs = self.get_user_preferences()
+            self._currency = prefs.get('currency', '₹')
+        return self._currency
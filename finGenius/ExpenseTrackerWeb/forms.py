@@ -0,0 +1,107 @@
+"""
+Form Schemas Module
+Declares the fields each POST route accepts and converts submitted values to their types
+"""
+
+from dataclasses import dataclass, fields, MISSING
+from datetime import datetime
+from typing import Mapping, Optional
+
+# Fields holding a calendar date, stored as YYYY-MM-DD (the database CHECKs it)
+DATE_FIELDS = {'date', 'deadline'}
+
+
+class FormError(ValueError):
+    """Raised when submitted form data is missing a field or has an invalid value"""
+
+
+def parse_form(schema, form: Mapping):
+    """
+    Build a schema instance from submitted form data
+
+    Args:
+        schema: Dataclass describing the expected fields
+        form: Submitted data (request.form or a parsed JSON dict)
+
+    Returns:
+        Instance of schema with values converted to the declared types
+    """
+    values = {}
+    for field in fields(schema):
+        raw = form.get(field.name)
+        if raw is None:
+            if field.default is MISSING:
+                raise FormError(f"Missing required field: {field.name}")
+            continue
+
+        if field.type is float:
+            try:
+                raw = float(raw)
+            except (TypeError, ValueError):
+                label = field.name.replace('_', ' ').capitalize()
+                raise FormError(f"{label} must be a number (e.g., 250 or 250.50).")
+        elif field.name in DATE_FIELDS:
+            raw = str(raw).strip()
+            if not raw and field.default is not MISSING:
+                continue
+            try:
+                datetime.strptime(raw, '%Y-%m-%d')
+            except ValueError:
+                label = field.name.replace('_', ' ').capitalize()
+                raise FormError(f"{label} must be a valid date in YYYY-MM-DD format (e.g., 2025-03-31).")
+
+        values[field.name] = raw
+    return schema(**values)
+
+
+@dataclass
+class TransactionForm:
+    """Expense or income entry (add, edit)"""
+    date: str
+    category: str
+    description: str
+    amount: float
+    mood: str = '😊'
+
+
+@dataclass
+class ReceiptForm:
+    """Expense confirmed from a scanned receipt"""
+    date: str
+    amount: float
+    category: str
+    description: str
+    file_path: str = ''
+
+
+@dataclass
+class GoalForm:
+    """New savings goal"""
+    title: str
+    target_amount: float
+    deadline: Optional[str] = None
+    category: str = 'General'
+
+
+@dataclass
+class GoalProgressForm:
+    """Amount added to a savings goal"""
+    amount: float
+
+
+@dataclass
+class GroupExpenseForm:
+    """Group expense to split between participants"""
+    title: str
+    total_amount: float
+    participants: str
+    paid_by: str
+    date: str
+    description: str = ''
+
+
+@dataclass
+class BudgetLimitForm:
+    """Monthly limit for a budget category"""
+    category: str
+    limit: float
@@ -4,11 +4,19 @@ Handles receipt image processing and text extraction using pytesseract or easyoc
 """
 
 import os
+import json
+import hashlib
+import tempfile
+import threading
 import cv2
 import numpy as np
 import pytesseract
 from PIL import Image
 import re
+import string
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import logging
 
@@ -19,27 +27,211 @@ try:
 except ImportError:
     EASYOCR_AVAILABLE = False
 
+# Try to import pyahocorasick for single-pass keyword matching
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Longest image edge fed to OCR; larger photos are downscaled to about 300 DPI
+MAX_OCR_DIMENSION = 1600
+
+# Shorter tesseract output is retried with another page segmentation mode
+MIN_OCR_TEXT_LENGTH = 20
+
+# Smallest batch worth a single easyocr readtext_batched pass
+EASYOCR_MIN_BATCH = 8
+
+# Part of every OCR cache file name; bump it when OCR or parsing changes so
+# results cached by the old code are not served again
+OCR_CACHE_VERSION = 2
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Patterns used to parse OCR text, compiled once at import
+AMOUNT_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'[Tt][Oo][Tt][Aa][Ll][:\s]*[\$€£¥₹]?\s*(\d+[,.]?\d*)',  # Total amount (case insensitive)
+    r'[Aa][Mm][Oo][Uu][Nn][Tt][:\s]*[\$€£¥₹]?\s*(\d+[,.]?\d*)',  # Amount field (case insensitive)
+    r'[\$€£¥₹]\s*(\d+[,.]?\d*)',  # Currency symbol followed by amount
+    r'(\d+[,.]\d{2})\s*[\$€£¥₹]',  # Amount followed by currency symbol
+    r'(\d+\.\d{2})',  # Standard decimal format
+    r'(\d+,\d{2})',   # Comma decimal format
+    r'\b(\d{1,3}[,.]\d{2,3}[,.]\d{2,3}[,.]\d{2})\b',  # Large amounts with commas/spaces
+    r'\b(\d+\.\d{2})\b',  # Standalone amounts with decimal
+))
+# All amount patterns in one alternation. Lines it does not match cannot
+# yield an amount, so they skip the individual patterns entirely.
+AMOUNT_ANY_RE = re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in AMOUNT_PATTERNS),
+                           re.IGNORECASE)
+TOTAL_KEYWORD_RE = re.compile(r'[Tt][Oo][Tt][Aa][Ll]|[Aa][Mm][Oo][Uu][Nn][Tt]')
+SUBTOTAL_RE = re.compile(r'sub[\s-]*total', re.IGNORECASE)
+# Lines scanned for the amount, starting at the grand total line
+TOTAL_LOOKAHEAD = 3
+
+MERCHANT_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'^[A-Z][A-Z\s&]+$',  # All caps with spaces and &
+    r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*$',  # Title case words
+    r'^[A-Z][A-Za-z\s&.,-]+(?:Inc|LLC|Ltd|Corp)\.?$',  # Company names
+))
+# Common merchant indicators
+MERCHANT_INDICATORS = (
+    'store', 'shop', 'mart', 'center', 'plaza', 'mall', 'outlet',
+    'supermarket', 'grocery', 'restaurant', 'cafe', 'coffee',
+    'corp', 'inc', 'llc', 'ltd', 'company', 'enterprise'
+)
+EDGE_PUNCTUATION_RE = re.compile(r'^[^A-Za-z0-9]+|[^A-Za-z0-9]+$')
+# Deletes ASCII letters; the length difference is the letter count
+DELETE_LETTERS = str.maketrans('', '', string.ascii_letters)
+DIGIT_RE = re.compile(r'\d')
+
+DATE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})',  # MM/DD/YYYY or DD/MM/YYYY
+    r'(\d{4})[/-](\d{1,2})[/-](\d{1,2})',  # YYYY/MM/DD
+    r'(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s*,?\s*(\d{4})',  # DD Mon YYYY
+    r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})',  # MM/DD/YY or DD/MM/YY
+    r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{1,2})[a-z]*,?\s*(\d{4})',  # Mon DD YYYY
+    r'(\d{8})',  # YYYYMMDD
+))
+# Indexes into DATE_PATTERNS
+DAY_MONTH_NAME_YEAR, MONTH_NAME_DAY_YEAR, COMPACT_DATE = 2, 4, 5
+MONTH_NUMBERS = {
+    'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
+    'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
+    'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
+}
+
+# Enhanced category keywords with more specific terms, as (category, keywords) pairs
+CATEGORY_KEYWORDS = (
+    ('Food & Dining', (
+        'restaurant', 'cafe', 'coffee', 'food', 'dining', 'pizza', 'burger', 'subway', 
+        'mcdonalds', 'kfc', 'dominos', 'taco bell', 'starbucks', 'wendy', 'burger king',
+        'chipotle', 'panera', 'dunkin', 'mexico', 'italian', 'chinese', 'indian',
+        'sushi', 'steak', 'grill', 'pub', 'bar', 'wine', 'beer'
+    )),
+    ('Transportation', (
+        'uber', 'lyft', 'taxi', 'gas', 'fuel', 'parking', 'metro', 'bus', 'train', 
+        'flight', 'airline', 'car', 'vehicle', 'auto', 'petrol', 'diesel', 'toll',
+        'rental', 'uber eats', 'doordash', 'grubhub'
+    )),
+    ('Shopping', (
+        'store', 'shop', 'mall', 'amazon', 'walmart', 'target', 'clothing', 'fashion', 
+        'electronics', 'best buy', 'costco', 'ikea', 'home depot', 'lowes', 'macys',
+        'nike', 'adidas', 'zara', 'uniqlo', 'h&m', 'gap', 'books', 'toys', 'gift'
+    )),
+    ('Entertainment', (
+        'movie', 'cinema', 'theater', 'netflix', 'spotify', 'game', 'entertainment', 
+        'concert', 'ticket', 'disney', 'hulu', 'youtube', 'prime video', 'hbo',
+        'playstation', 'xbox', 'nintendo', 'steam', 'apple music', 'tidal'
+    )),
+    ('Healthcare', (
+        'pharmacy', 'drug', 'medical', 'doctor', 'hospital', 'clinic', 'cvs', 'walgreens',
+        'cvs pharmacy', 'rite aid', 'dentist', 'optometrist', 'therapy', 'prescription',
+        'vitamin', 'supplement', 'insurance'
+    )),
+    ('Bills & Utilities', (
+        'electric', 'water', 'internet', 'phone', 'cable', 'utility', 'bill', 'payment',
+        'verizon', 'at&t', 'comcast', 'xfinity', 'spectrum', 'duke energy', 'pg&e',
+        'rent', 'mortgage', 'subscription', 'membership', 'fee'
+    )),
+    ('Education', (
+        'school', 'university', 'college', 'book', 'tuition', 'education', 'course',
+        'student', 'loan', 'textbook', 'software', 'udemy', 'coursera', 'skillshare',
+        'khan academy', 'harvard', 'mit', 'stanford'
+    )),
+    ('Groceries', (
+        'grocery', 'market', 'supermarket', 'whole foods', 'trader joe', 'aldi', 'kroger',
+        'safeway', 'publix', 'winn-dixie', 'food lion', 'fresh market', 'produce', 'vegetable'
+    )),
+    ('Others', ()),
+)
+
+
+def build_keyword_categories():
+    """Map each category keyword to the categories that list it"""
+    keyword_categories = {}
+    for category, keywords in CATEGORY_KEYWORDS:
+        for keyword in keywords:
+            keyword_categories.setdefault(keyword, []).append(category)
+    return keyword_categories
+
+
+KEYWORD_CATEGORIES = build_keyword_categories()
+
+
+def build_keyword_automaton():
+    """Build an Aho-Corasick automaton that finds every category keyword in one pass"""
+    automaton = ahocorasick.Automaton()
+    for keyword in KEYWORD_CATEGORIES:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+KEYWORD_AUTOMATON = build_keyword_automaton() if AHOCORASICK_AVAILABLE else None
+
+
 class ReceiptProcessor:
-    def __init__(self):
-        """Initialize the receipt processor"""
+    # The easyocr models take seconds to load, so a single reader is
+    # created on first use and shared by every processor
+    _shared_reader = None
+    _reader_loaded = False
+    _reader_lock = threading.Lock()
+    
+    def __init__(self, cache_dir: str = os.path.join('cache', 'ocr')):
+        """
+        Initialize the receipt processor
+        
+        Args:
+            cache_dir: Directory where OCR results are stored by image hash
+        """
+        self.cache_dir = cache_dir
+        
         # Configure tesseract path (adjust for your system)
         # For Windows, you might need to set the path to tesseract.exe
         # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
         
         # For Linux/Mac, tesseract should be in PATH
+    
+    @classmethod
+    def get_easyocr_reader(cls):
+        """
+        Get the shared easyocr reader, loading it on first use
         
-        # Initialize easyocr reader if available
-        self.easyocr_reader = None
-        if EASYOCR_AVAILABLE:
-            try:
-                self.easyocr_reader = easyocr.Reader(['en'])
-            except Exception as e:
-                logger.warning(f"Could not initialize easyocr: {e}")
-                self.easyocr_reader = None
+        Returns:
+            easyocr.Reader, or None if easyocr is unavailable or failed to load
+        """
+        if not cls._reader_loaded:
+            with cls._reader_lock:
+                if not cls._reader_loaded:
+                    cls._shared_reader = cls.load_easyocr_reader()
+                    cls._reader_loaded = True
+        return cls._shared_reader
+    
+    @staticmethod
+    def load_easyocr_reader():
+        """Initialize an easyocr reader if available"""
+        if not EASYOCR_AVAILABLE:
+            return None
+        try:
+            # Uses the GPU when there is one; on CPU the models run
+            # int8-quantized
+            reader = easyocr.Reader(['en'], gpu=True, quantize=True, cudnn_benchmark=True)
+            if reader.device != 'cpu':
+                # Warm up the GPU so the first batch doesn't pay for
+                # cuDNN autotuning
+                reader.readtext_batched(np.zeros([EASYOCR_MIN_BATCH, 600, 800, 3], dtype=np.uint8))
+            return reader
+        except Exception as e:
+            logger.warning(f"Could not initialize easyocr: {e}")
+            return None
+    
+    @property
+    def easyocr_reader(self):
+        """Shared easyocr reader, or None when only tesseract is available"""
+        return self.get_easyocr_reader()
 
     def preprocess_image(self, image_path: str) -> np.ndarray:
         """
@@ -52,38 +244,41 @@ class ReceiptProcessor:
             Preprocessed image as numpy array
         """
         try:
-            # Read the image
-            image = cv2.imread(image_path)
+            # Read the image straight into grayscale; every step below
+            # then works in place on this one buffer
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
             if image is None:
                 raise ValueError(f"Could not read image from {image_path}")
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # Downscale large phone photos; OCR doesn't need more resolution
+            height, width = image.shape
+            scale = MAX_OCR_DIMENSION / max(height, width)
+            if scale < 1.0:
+                image = cv2.resize(image, (int(width * scale), int(height * scale)),
+                                   interpolation=cv2.INTER_AREA)
             
             # Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            cv2.GaussianBlur(image, (5, 5), 0, dst=image)
             
             # Apply adaptive thresholding
-            thresh = cv2.adaptiveThreshold(
-                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+            cv2.adaptiveThreshold(
+                image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2, dst=image
             )
             
-            # Morphological operations to clean up the image
-            kernel = np.ones((1, 1), np.uint8)
-            cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            
-            return cleaned
+            return image
             
         except Exception as e:
             logger.error(f"Error preprocessing image: {e}")
             raise
     
-    def extract_text(self, image_path: str) -> str:
+    def extract_text(self, image_path: str, multi_config: bool = False) -> str:
         """
         Extract text from receipt image using OCR
         
         Args:
             image_path: Path to the receipt image
+            multi_config: Run every tesseract configuration and keep the
+                longest result instead of stopping at the first usable one
             
         Returns:
             Extracted text as string
@@ -102,6 +297,22 @@ class ReceiptProcessor:
             # Preprocess the image
             processed_image = self.preprocess_image(image_path)
             
+            if not multi_config:
+                best_text = ""
+                # Retry once assuming a single column of text of variable
+                # sizes when the default segmentation finds little text
+                for config in (r'--oem 3 --psm 6', r'--oem 3 --psm 4'):
+                    try:
+                        text = pytesseract.image_to_string(processed_image, config=config).strip()
+                    except Exception as e:
+                        logger.warning(f"OCR config failed: {config} - {e}")
+                        continue
+                    if len(text) > len(best_text):
+                        best_text = text
+                    if len(best_text) >= MIN_OCR_TEXT_LENGTH:
+                        break
+                return best_text
+            
             # Try multiple OCR configurations for better accuracy
             configs = [
                 r'--oem 3 --psm 6',  # Default
@@ -129,82 +340,148 @@ class ReceiptProcessor:
             logger.error(f"Error extracting text: {e}")
             raise
     
-    def extract_amount(self, text: str) -> Optional[float]:
+    def extract_texts(self, image_paths: List[str]) -> List[str]:
+        """
+        Extract text from several receipt images with a single tesseract run
+        
+        The preprocessed images are listed in a text file that tesseract
+        reads in one process, so the language model is loaded once for the
+        whole batch instead of once per image.
+        
+        Args:
+            image_paths: Paths to the receipt images
+            
+        Returns:
+            Extracted text for each image, in the same order
+        """
+        if not image_paths:
+            return []
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            list_path = os.path.join(temp_dir, 'images.txt')
+            with open(list_path, 'w', encoding='utf-8') as image_list:
+                for i, image_path in enumerate(image_paths):
+                    processed_path = os.path.join(temp_dir, f"{i}.png")
+                    cv2.imwrite(processed_path, self.preprocess_image(image_path))
+                    image_list.write(processed_path + '\n')
+            
+            output = pytesseract.image_to_string(list_path, config=r'--oem 3 --psm 6')
+        
+        # Tesseract ends every page with a form feed
+        pages = [page.strip() for page in output.split('\f')]
+        pages += [''] * (len(image_paths) - len(pages))
+        return pages[:len(image_paths)]
+    
+    def extract_text_batch(self, image_paths: List[str], n_width: int = 1024, n_height: int = 1024) -> List[str]:
+        """
+        Extract text from several receipt images with easyocr
+        
+        Batches of at least EASYOCR_MIN_BATCH images go through a single
+        readtext_batched pass, with every image resized to n_width x n_height;
+        smaller batches are read one image at a time.
+        
+        Args:
+            image_paths: Paths to the receipt images
+            n_width: Width images are resized to for the batched pass
+            n_height: Height images are resized to for the batched pass
+            
+        Returns:
+            Extracted text for each image, in the same order
+        """
+        if len(image_paths) >= EASYOCR_MIN_BATCH:
+            results_per_image = self.easyocr_reader.readtext_batched(
+                image_paths, n_width=n_width, n_height=n_height
+            )
+        else:
+            results_per_image = [self.easyocr_reader.readtext(path) for path in image_paths]
+        
+        return ["\n".join(result[1] for result in results).strip() for results in results_per_image]
+    
+    def parse_amounts(self, line: str) -> List[float]:
+        """
+        Parse every amount-like value on a stripped line of OCR text
+        
+        Args:
+            line: Stripped line of OCR text
+            
+        Returns:
+            Amounts in a reasonable range, one entry per pattern match
+        """
+        amounts = []
+        if not line or not AMOUNT_ANY_RE.search(line):
+            return amounts
+        
+        for pattern in AMOUNT_PATTERNS:
+            for match in pattern.findall(line):
+                try:
+                    # The capture groups only hold digits, ',' and '.';
+                    # commas are dropped as thousands separators
+                    amount = float(match.replace(',', ''))
+                except ValueError:
+                    continue
+                
+                # Reasonable amount range (0.01 to 999999.99)
+                if 0.01 <= amount <= 999999.99:
+                    amounts.append(amount)
+        return amounts
+    
+    def extract_amount(self, text: str, lines: Optional[List[str]] = None) -> Optional[float]:
         """
         Extract monetary amount from OCR text
         
+        The grand total is usually the last TOTAL/AMOUNT line, so that is
+        tried first, scanning up from the bottom; the whole receipt is only
+        scanned when no amount is found there.
+        
         Args:
             text: OCR extracted text
+            lines: The text already split on newlines, when the caller has it
             
         Returns:
             Extracted amount as float, or None if not found
         """
         try:
             # Split text into lines for better pattern matching
-            lines = text.split('\n')
-            
-            # Common currency symbols and patterns
-            currency_patterns = [
-                r'[Tt][Oo][Tt][Aa][Ll][:\s]*[\$€£¥₹]?\s*(\d+[,.]?\d*)',  # Total amount (case insensitive)
-                r'[Aa][Mm][Oo][Uu][Nn][Tt][:\s]*[\$€£¥₹]?\s*(\d+[,.]?\d*)',  # Amount field (case insensitive)
-                r'[\$€£¥₹]\s*(\d+[,.]?\d*)',  # Currency symbol followed by amount
-                r'(\d+[,.]\d{2})\s*[\$€£¥₹]',  # Amount followed by currency symbol
-                r'(\d+\.\d{2})',  # Standard decimal format
-                r'(\d+,\d{2})',   # Comma decimal format
-                r'\b(\d{1,3}[,.]\d{2,3}[,.]\d{2,3}[,.]\d{2})\b',  # Large amounts with commas/spaces
-                r'\b(\d+\.\d{2})\b',  # Standalone amounts with decimal
-            ]
+            if lines is None:
+                lines = text.split('\n')
             
-            amounts = []
+            # Look for the amount on or just below the last grand total line
+            for idx in range(len(lines) - 1, -1, -1):
+                line = lines[idx]
+                if not TOTAL_KEYWORD_RE.search(line) or SUBTOTAL_RE.search(line):
+                    continue
+                for i in range(idx, min(len(lines), idx + TOTAL_LOOKAHEAD)):
+                    total_amounts = self.parse_amounts(lines[i].strip())
+                    if total_amounts:
+                        # Most often matched value on the line, first found on ties
+                        return Counter(total_amounts).most_common(1)[0][0]
+                break
             
             # Check each line separately for better accuracy
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                for pattern in currency_patterns:
-                    matches = re.findall(pattern, line, re.IGNORECASE)
-                    for match in matches:
-                        try:
-                            # Clean the match
-                            clean_amount = match.replace(',', '').replace(' ', '')
-                            # Handle European decimal format
-                            if ',' in clean_amount and '.' not in clean_amount:
-                                clean_amount = clean_amount.replace(',', '.')
-                            amount = float(clean_amount)
-                            
-                            # Reasonable amount range (0.01 to 999999.99)
-                            if 0.01 <= amount <= 999999.99:
-                                amounts.append(amount)
-                        except ValueError:
-                            continue
+            amounts_by_line = [self.parse_amounts(line.strip()) for line in lines]
+            amounts = [amount for line_amounts in amounts_by_line for amount in line_amounts]
             
             if amounts:
-                # Sort by frequency and then by value
-                from collections import Counter
-                amount_counts = Counter(amounts)
-                most_common = amount_counts.most_common()
+                # Most frequent amount, first found on ties
+                best_amount, best_count = max(Counter(amounts).items(), key=lambda item: item[1])
                 
                 # If we have a clear winner (appears more than once), use it
-                if most_common and most_common[0][1] > 1:
-                    return most_common[0][0]
+                if best_count > 1:
+                    return best_amount
                 
                 # Otherwise, look for amounts near "TOTAL" or "AMOUNT" keywords
                 total_line_indices = []
                 for i, line in enumerate(lines):
-                    if re.search(r'[Tt][Oo][Tt][Aa][Ll]|[Aa][Mm][Oo][Uu][Nn][Tt]', line):
+                    if TOTAL_KEYWORD_RE.search(line):
                         total_line_indices.append(i)
                 
-                if total_line_indices and amounts:
-                    # Prefer amounts found on or near total lines
-                    for idx in total_line_indices:
-                        # Check the total line and surrounding lines
-                        for i in range(max(0, idx-2), min(len(lines), idx+3)):
-                            line = lines[i]
-                            for amount in amounts:
-                                if str(amount) in line or str(int(amount)) in line:
-                                    return amount
+                # Prefer amounts found on or near total lines
+                for idx in total_line_indices:
+                    # Check the total line and surrounding lines
+                    for i in range(max(0, idx-2), min(len(lines), idx+3)):
+                        candidates = amounts_by_line[i]
+                        if candidates:
+                            return max(candidates)
                 
                 # Return the largest reasonable amount as fallback
                 return max(amounts)
@@ -215,49 +492,41 @@ class ReceiptProcessor:
             logger.error(f"Error extracting amount: {e}")
             return None
     
-    def extract_merchant(self, text: str) -> Optional[str]:
+    def extract_merchant(self, text: str, lines: Optional[List[str]] = None,
+                         lines_lower: Optional[List[str]] = None) -> Optional[str]:
         """
         Extract merchant name from OCR text
         
         Args:
             text: OCR extracted text
+            lines: The text already split on newlines, when the caller has it
+            lines_lower: The same lines lowercased, when the caller has them
             
         Returns:
             Merchant name or None if not found
         """
         try:
-            lines = text.split('\n')
-            
-            # Common merchant indicators
-            merchant_indicators = [
-                'store', 'shop', 'mart', 'center', 'plaza', 'mall', 'outlet',
-                'supermarket', 'grocery', 'restaurant', 'cafe', 'coffee',
-                'corp', 'inc', 'llc', 'ltd', 'company', 'enterprise'
-            ]
-            
-            # Look for common merchant patterns
-            merchant_patterns = [
-                r'^[A-Z][A-Z\s&]+$',  # All caps with spaces and &
-                r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*$',  # Title case words
-                r'^[A-Z][A-Za-z\s&.,-]+(?:Inc|LLC|Ltd|Corp)\.?$',  # Company names
-            ]
+            # Only the first 15 lines are ever looked at
+            if lines is None:
+                lines = text.split('\n', 15)
             
             # First, look for lines that contain merchant indicators
-            for line in lines[:15]:  # Check first 15 lines
+            for i, line in enumerate(lines[:15]):  # Check first 15 lines
                 line = line.strip()
                 if len(line) > 3 and len(line) < 60:  # Reasonable length
-                    line_lower = line.lower()
+                    line_lower = lines_lower[i].strip() if lines_lower is not None else line.lower()
                     # Check if line contains merchant indicators
-                    if any(indicator in line_lower for indicator in merchant_indicators):
+                    if any(indicator in line_lower for indicator in MERCHANT_INDICATORS):
                         # Clean the line - remove extra spaces and special characters at ends
-                        clean_line = re.sub(r'^[^A-Za-z0-9]+|[^A-Za-z0-9]+$', '', line)
+                        clean_line = EDGE_PUNCTUATION_RE.sub('', line)
                         if len(clean_line) > 2:
                             return clean_line
                     
-                    # Check pattern matches
-                    for pattern in merchant_patterns:
-                        if re.match(pattern, line):
-                            return line
+                    # Check pattern matches (all of them start with a capital)
+                    if 'A' <= line[0] <= 'Z':
+                        for pattern in MERCHANT_PATTERNS:
+                            if pattern.match(line):
+                                return line
             
             # If no pattern matches, look for the most prominent line
             # (longest line without too many numbers)
@@ -268,8 +537,8 @@ class ReceiptProcessor:
                 line = line.strip()
                 if len(line) > 5 and len(line) < 60:  # Reasonable length
                     # Score based on length and letter-to-digit ratio
-                    letter_count = len(re.findall(r'[A-Za-z]', line))
-                    digit_count = len(re.findall(r'\d', line))
+                    letter_count = len(line) - len(line.translate(DELETE_LETTERS))
+                    digit_count = sum(map(str.isdecimal, line))
                     
                     # Prefer lines with more letters than digits
                     if letter_count > digit_count:
@@ -284,7 +553,7 @@ class ReceiptProcessor:
             # Last resort: return the first substantial line without numbers
             for line in lines[:8]:
                 line = line.strip()
-                if len(line) > 5 and len(line) < 50 and not re.search(r'\d', line):
+                if len(line) > 5 and len(line) < 50 and not DIGIT_RE.search(line):
                     return line
             
             return None
@@ -293,35 +562,21 @@ class ReceiptProcessor:
             logger.error(f"Error extracting merchant: {e}")
             return None
     
-    def extract_date(self, text: str) -> Optional[str]:
+    def extract_date(self, text: str, lines: Optional[List[str]] = None) -> Optional[str]:
         """
         Extract date from OCR text
         
         Args:
             text: OCR extracted text
+            lines: The text already split on newlines, when the caller has it
             
         Returns:
             Date in YYYY-MM-DD format or None if not found
         """
         try:
             # Split text into lines for better processing
-            lines = text.split('\n')
-            
-            # Common date patterns with more variations
-            date_patterns = [
-                r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})',  # MM/DD/YYYY or DD/MM/YYYY
-                r'(\d{4})[/-](\d{1,2})[/-](\d{1,2})',  # YYYY/MM/DD
-                r'(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s*,?\s*(\d{4})',  # DD Mon YYYY
-                r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})',  # MM/DD/YY or DD/MM/YY
-                r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{1,2})[a-z]*,?\s*(\d{4})',  # Mon DD YYYY
-                r'(\d{8})',  # YYYYMMDD
-            ]
-            
-            month_names = {
-                'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
-                'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
-                'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
-            }
+            if lines is None:
+                lines = text.split('\n')
             
             # Check each line separately for better accuracy
             for line in lines:
@@ -329,17 +584,16 @@ class ReceiptProcessor:
                 if not line:
                     continue
                     
-                for pattern in date_patterns:
-                    matches = re.findall(pattern, line, re.IGNORECASE)
-                    for match in matches:
+                for index, pattern in enumerate(DATE_PATTERNS):
+                    for match in pattern.findall(line):
                         try:
                             if len(match) == 3:
-                                if pattern == date_patterns[2] or pattern == date_patterns[4]:  # Text month formats
-                                    if pattern == date_patterns[2]:  # DD Mon YYYY
+                                if index in (DAY_MONTH_NAME_YEAR, MONTH_NAME_DAY_YEAR):  # Text month formats
+                                    if index == DAY_MONTH_NAME_YEAR:  # DD Mon YYYY
                                         day, month, year = match
                                     else:  # Mon DD YYYY
                                         month, day, year = match
-                                    month_num = month_names.get(month.lower()[:3])
+                                    month_num = MONTH_NUMBERS.get(month.lower()[:3])
                                     if month_num:
                                         # Validate year
                                         year = int(year)
@@ -362,7 +616,7 @@ class ReceiptProcessor:
                                     year, month, day = int(year), int(month), int(day)
                                     if 1 <= month <= 12 and 1 <= day <= 31:
                                         return f"{year}-{month:02d}-{day:02d}"
-                            elif len(match) == 1 and pattern == date_patterns[5]:  # YYYYMMDD
+                            elif len(match) == 1 and index == COMPACT_DATE:  # YYYYMMDD
                                 date_str = match[0]
                                 if len(date_str) == 8:
                                     year, month, day = int(date_str[:4]), int(date_str[4:6]), int(date_str[6:8])
@@ -377,105 +631,70 @@ class ReceiptProcessor:
             logger.error(f"Error extracting date: {e}")
             return None
     
-    def categorize_expense(self, text: str, merchant: str = None) -> str:
+    def matched_keywords(self, text: str) -> set:
+        """
+        Find the category keywords contained in lowercased text
+        
+        Args:
+            text: Lowercased text to search
+            
+        Returns:
+            Set of keywords from KEYWORD_CATEGORIES found in the text
+        """
+        if KEYWORD_AUTOMATON is not None:
+            return {keyword for _, keyword in KEYWORD_AUTOMATON.iter(text)}
+        return {keyword for keyword in KEYWORD_CATEGORIES if keyword in text}
+    
+    def categorize_expense(self, text: str, merchant: str = None,
+                           lines_lower: Optional[List[str]] = None) -> str:
         """
         Categorize expense based on text content and merchant
         
+        Each keyword counts once per line it appears on, doubled on
+        total/amount lines; ties go to the category listed first in
+        CATEGORY_KEYWORDS.
+        
         Args:
             text: OCR extracted text
             merchant: Merchant name if available
+            lines_lower: The text lowercased and split on newlines, when the
+                caller has it
             
         Returns:
             Expense category
         """
         try:
-            text_lower = text.lower()
+            if lines_lower is None:
+                lines_lower = text.lower().split('\n')
             merchant_lower = (merchant or "").lower()
             
-            # Enhanced category keywords with more specific terms
-            categories = {
-                'Food & Dining': [
-                    'restaurant', 'cafe', 'coffee', 'food', 'dining', 'pizza', 'burger', 'subway', 
-                    'mcdonalds', 'kfc', 'dominos', 'taco bell', 'starbucks', 'wendy', 'burger king',
-                    'chipotle', 'panera', 'dunkin', 'mexico', 'italian', 'chinese', 'indian',
-                    'sushi', 'steak', 'grill', 'pub', 'bar', 'wine', 'beer'
-                ],
-                'Transportation': [
-                    'uber', 'lyft', 'taxi', 'gas', 'fuel', 'parking', 'metro', 'bus', 'train', 
-                    'flight', 'airline', 'car', 'vehicle', 'auto', 'petrol', 'diesel', 'toll',
-                    'rental', 'uber eats', 'doordash', 'grubhub'
-                ],
-                'Shopping': [
-                    'store', 'shop', 'mall', 'amazon', 'walmart', 'target', 'clothing', 'fashion', 
-                    'electronics', 'best buy', 'costco', 'ikea', 'home depot', 'lowes', 'macys',
-                    'nike', 'adidas', 'zara', 'uniqlo', 'h&m', 'gap', 'books', 'toys', 'gift'
-                ],
-                'Entertainment': [
-                    'movie', 'cinema', 'theater', 'netflix', 'spotify', 'game', 'entertainment', 
-                    'concert', 'ticket', 'disney', 'hulu', 'youtube', 'prime video', 'hbo',
-                    'playstation', 'xbox', 'nintendo', 'steam', 'apple music', 'tidal'
-                ],
-                'Healthcare': [
-                    'pharmacy', 'drug', 'medical', 'doctor', 'hospital', 'clinic', 'cvs', 'walgreens',
-                    'cvs pharmacy', 'rite aid', 'dentist', 'optometrist', 'therapy', 'prescription',
-                    'vitamin', 'supplement', 'insurance'
-                ],
-                'Bills & Utilities': [
-                    'electric', 'water', 'internet', 'phone', 'cable', 'utility', 'bill', 'payment',
-                    'verizon', 'at&t', 'comcast', 'xfinity', 'spectrum', 'duke energy', 'pg&e',
-                    'rent', 'mortgage', 'subscription', 'membership', 'fee'
-                ],
-                'Education': [
-                    'school', 'university', 'college', 'book', 'tuition', 'education', 'course',
-                    'student', 'loan', 'textbook', 'software', 'udemy', 'coursera', 'skillshare',
-                    'khan academy', 'harvard', 'mit', 'stanford'
-                ],
-                'Groceries': [
-                    'grocery', 'market', 'supermarket', 'whole foods', 'trader joe', 'aldi', 'kroger',
-                    'safeway', 'publix', 'winn-dixie', 'food lion', 'fresh market', 'produce', 'vegetable'
-                ],
-                'Others': []
-            }
-            
-            # Check merchant first with fuzzy matching
+            # Check merchant first
             if merchant_lower:
-                for category, keywords in categories.items():
-                    # Direct match
-                    if any(keyword in merchant_lower for keyword in keywords):
+                matched = {category
+                           for keyword in self.matched_keywords(merchant_lower)
+                           for category in KEYWORD_CATEGORIES[keyword]}
+                for category, _ in CATEGORY_KEYWORDS:
+                    if category in matched:
                         return category
-                    
-                    # Partial match with higher threshold
-                    for keyword in keywords:
-                        if len(keyword) > 4 and keyword in merchant_lower:
-                            return category
-            
-            # Check text content with scoring
-            category_scores = {}
-            lines = text_lower.split('\n')
-            
-            for category, keywords in categories.items():
-                score = 0
-                # Check each line for keywords
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                        
-                    # Weight keywords in lines with "total" or "amount" higher
-                    weight = 2 if any(word in line for word in ['total', 'amount', 'subtotal']) else 1
-                    
-                    for keyword in keywords:
-                        if keyword in line:
-                            score += weight
-                        elif len(keyword) > 4 and keyword in line:
-                            score += weight * 0.5  # Partial match
+            
+            # Check text content with scoring, one pass over the lines
+            category_scores = Counter()
+            for line in lines_lower:
+                line = line.strip()
+                if not line:
+                    continue
                 
-                if score > 0:
-                    category_scores[category] = score
+                # Weight keywords in lines with "total" or "amount" higher
+                weight = 2 if ('total' in line or 'amount' in line) else 1
+                
+                for keyword in self.matched_keywords(line):
+                    for category in KEYWORD_CATEGORIES[keyword]:
+                        category_scores[category] += weight
             
             # Return category with highest score
             if category_scores:
-                return max(category_scores, key=category_scores.get)
+                return max((category for category, _ in CATEGORY_KEYWORDS if category in category_scores),
+                           key=category_scores.get)
             
             return 'Others'
             
@@ -483,10 +702,99 @@ class ReceiptProcessor:
             logger.error(f"Error categorizing expense: {e}")
             return 'Others'
     
+    def hash_image(self, image_path: str) -> str:
+        """
+        Hash the raw bytes of an image file
+        
+        Args:
+            image_path: Path to the receipt image
+            
+        Returns:
+            Hex digest identifying the image contents
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def cache_path(self, image_hash: str) -> str:
+        """Path of the cache file for an image hash under the current OCR_CACHE_VERSION"""
+        return os.path.join(self.cache_dir, f"{image_hash}-v{OCR_CACHE_VERSION}.json")
+    
+    def load_cached_result(self, image_hash: str) -> Optional[Dict]:
+        """Return the stored OCR result for an image hash, if any"""
+        try:
+            with open(self.cache_path(image_hash), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def store_cached_result(self, image_hash: str, result: Dict):
+        """Store an OCR result under its image hash, unless OCR found no text"""
+        # extract_text returns "" when OCR fails (e.g. tesseract is missing),
+        # which must not stick once OCR works again
+        if not result.get('success') or not result.get('raw_text', '').strip():
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_path = self.cache_path(image_hash)
+            temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache OCR result: {e}")
+    
+    def parse_text(self, text: str) -> Dict:
+        """
+        Extract structured receipt data from OCR text
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            Dictionary containing extracted data
+        """
+        # Split and lowercase once and share the lines between the extractors
+        lines = text.split('\n')
+        lines_lower = text.lower().split('\n')
+        
+        amount = self.extract_amount(text, lines)
+        merchant = self.extract_merchant(text, lines, lines_lower)
+        date = self.extract_date(text, lines)
+        category = self.categorize_expense(text, merchant, lines_lower)
+        
+        return {
+            'success': True,
+            'raw_text': text,
+            'amount': amount,
+            'merchant': merchant,
+            'date': date,
+            'category': category,
+            'confidence': self.calculate_confidence(text, amount, merchant, date)
+        }
+    
+    def failed_result(self, error: Exception) -> Dict:
+        """Build the result returned when a receipt could not be processed"""
+        return {
+            'success': False,
+            'error': str(error),
+            'raw_text': '',
+            'amount': None,
+            'merchant': None,
+            'date': None,
+            'category': 'Others',
+            'confidence': 0
+        }
+    
     def process_receipt(self, image_path: str) -> Dict:
         """
         Process a receipt image and extract structured data
         
+        Results are cached on disk by image hash, so uploading the same
+        receipt again skips OCR.
+        
         Args:
             image_path: Path to the receipt image
             
@@ -496,41 +804,97 @@ class ReceiptProcessor:
         try:
             logger.info(f"Processing receipt: {image_path}")
             
+            image_hash = self.hash_image(image_path)
+            cached = self.load_cached_result(image_hash)
+            if cached is not None:
+                logger.info(f"Using cached OCR result for {image_hash}")
+                return cached
+            
             # Extract text
             text = self.extract_text(image_path)
             logger.info(f"Extracted text length: {len(text)}")
             
-            # Extract structured data
-            amount = self.extract_amount(text)
-            merchant = self.extract_merchant(text)
-            date = self.extract_date(text)
-            category = self.categorize_expense(text, merchant)
-            
-            result = {
-                'success': True,
-                'raw_text': text,
-                'amount': amount,
-                'merchant': merchant,
-                'date': date,
-                'category': category,
-                'confidence': self.calculate_confidence(text, amount, merchant, date)
-            }
-            
+            result = self.parse_text(text)
             logger.info(f"Processing result: {result}")
+            self.store_cached_result(image_hash, result)
             return result
             
         except Exception as e:
             logger.error(f"Error processing receipt: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'raw_text': '',
-                'amount': None,
-                'merchant': None,
-                'date': None,
-                'category': 'Others',
-                'confidence': 0
-            }
+            return self.failed_result(e)
+    
+    def process_receipts(self, image_paths: List[str]) -> List[Dict]:
+        """
+        Process several receipt images, running tesseract once for the batch
+        
+        Cached results are reused; only the remaining images are OCRed,
+        with easyocr when it is available and tesseract otherwise.
+        
+        Args:
+            image_paths: Paths to the receipt images
+            
+        Returns:
+            Result dictionary for each image, in the same order
+        """
+        results = [None] * len(image_paths)
+        pending = []
+        for i, image_path in enumerate(image_paths):
+            try:
+                image_hash = self.hash_image(image_path)
+            except OSError as e:
+                logger.error(f"Error processing receipt: {e}")
+                results[i] = self.failed_result(e)
+                continue
+            cached = self.load_cached_result(image_hash)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, image_hash))
+        
+        if pending:
+            pending_paths = [image_paths[i] for i, _ in pending]
+            texts = None
+            if self.easyocr_reader:
+                try:
+                    texts = self.extract_text_batch(pending_paths)
+                except Exception as e:
+                    logger.warning(f"EasyOCR failed, falling back to pytesseract: {e}")
+            
+            try:
+                if texts is None:
+                    texts = self.extract_texts(pending_paths)
+            except Exception as e:
+                logger.error(f"Error processing receipts: {e}")
+                for i, _ in pending:
+                    results[i] = self.failed_result(e)
+                return results
+            
+            for (i, image_hash), text in zip(pending, texts):
+                results[i] = self.parse_text(text)
+                self.store_cached_result(image_hash, results[i])
+        
+        return results
+    
+    def process_receipts_parallel(self, image_paths: List[str], max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        Process several receipt images on a pool of worker threads
+        
+        Tesseract and easyocr do their work in native code that releases the
+        GIL, so each receipt can be OCRed on its own thread.
+        
+        Args:
+            image_paths: Paths to the receipt images
+            max_workers: Number of worker threads (defaults to the CPU count)
+            
+        Returns:
+            Result dictionary for each image, in the same order
+        """
+        if not image_paths:
+            return []
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(image_paths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.process_receipt, image_paths))
     
     def calculate_confidence(self, text: str, amount: float, merchant: str, date: str) -> float:
         """
@@ -575,7 +939,6 @@ class ReceiptProcessor:
                 score += 0.15
                 # Validate date format
                 try:
-                    from datetime import datetime
                     datetime.strptime(date, '%Y-%m-%d')
                     score += 0.1  # Bonus for valid date format
                 except:
@@ -6,32 +6,100 @@ Automatically installs dependencies and sets up the application
 
 import os
 import sys
+import hashlib
+import shutil
 import subprocess
 import platform
 
-def run_command(command, description):
-    """Run a command and handle errors"""
+# Oldest supported Python (major, minor)
+MIN_PYTHON = (3, 8)
+
+# Package manager command that installs Tesseract, by platform.system()
+TESSERACT_INSTALL_COMMANDS = {
+    "darwin": "brew install tesseract",  # macOS
+    "linux": "sudo apt-get update && sudo apt-get install -y tesseract-ocr",
+}
+
+# Digest of requirements.txt (and the interpreter) from the last successful install
+SETUP_STATE_FILE = ".setup_state"
+
+def run_command(command, description, **kwargs):
+    """Run a command, streaming its output, and handle errors
+
+    command is either a shell string or an argument list, which runs
+    without a shell; extra keyword arguments go to subprocess.Popen.
+    """
     print(f"🔄 {description}...")
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        with subprocess.Popen(command, shell=isinstance(command, str), stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, bufsize=1, text=True, **kwargs) as process:
+            # Pass output through as it arrives instead of buffering it all
+            for line in process.stdout:
+                sys.stdout.write(line)
+        if process.returncode != 0:
+            print(f"❌ Error during {description}: exited with status {process.returncode}")
+            return False
         print(f"✅ {description} completed successfully!")
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error during {description}: {e.stderr}")
+    except OSError as e:
+        print(f"❌ Error during {description}: {e}")
         return False
 
 def check_python_version():
     """Check if Python version is compatible"""
     version = sys.version_info
-    if version.major < 3 or (version.major == 3 and version.minor < 8):
-        print("❌ Python 3.8 or higher is required!")
+    if version[:2] < MIN_PYTHON:
+        print(f"❌ Python {MIN_PYTHON[0]}.{MIN_PYTHON[1]} or higher is required!")
         print(f"Current version: {version.major}.{version.minor}.{version.micro}")
         return False
     print(f"✅ Python version {version.major}.{version.minor}.{version.micro} is compatible!")
     return True
 
+def requirements_digest():
+    """Hash requirements.txt together with the interpreter it is installed into (None if unreadable)"""
+    digest = hashlib.sha256(sys.executable.encode())
+    try:
+        with open("requirements.txt", "rb") as f:
+            digest.update(f.read())
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def dependencies_up_to_date(digest):
+    """Check whether the last successful install used the same requirements"""
+    try:
+        with open(SETUP_STATE_FILE) as f:
+            return f.read().strip() == digest
+    except OSError:
+        return False
+
+def install_dependencies():
+    """Install Python dependencies unless requirements.txt is unchanged since the last install"""
+    # An unreadable requirements.txt is never up to date; pip then
+    # reports the problem and the install fails
+    digest = requirements_digest()
+    if digest is not None and dependencies_up_to_date(digest):
+        print("✅ Python dependencies are up to date!")
+        return True
+    
+    # Install with the running interpreter's pip, preferring
+    # cached/prebuilt wheels over source builds
+    pip_command = [sys.executable, "-m", "pip", "install", "--prefer-binary", "-r", "requirements.txt"]
+    pip_env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK="1")
+    if not run_command(pip_command, "Installing Python dependencies", env=pip_env):
+        return False
+    
+    with open(SETUP_STATE_FILE, "w") as f:
+        f.write(digest)
+    return True
+
 def install_tesseract():
     """Install Tesseract OCR based on the operating system"""
+    # Nothing to install (and no package manager to run) on repeat setups
+    if shutil.which("tesseract"):
+        print("✅ Tesseract OCR is already installed!")
+        return True
+    
     system = platform.system().lower()
     
     if system == "windows":
@@ -40,25 +108,32 @@ def install_tesseract():
         print("2. Install and add to PATH")
         print("3. Update the path in ocr_processor.py if needed")
         return True
-    elif system == "darwin":  # macOS
-        return run_command("brew install tesseract", "Installing Tesseract OCR")
-    elif system == "linux":
-        return run_command("sudo apt-get update && sudo apt-get install -y tesseract-ocr", "Installing Tesseract OCR")
-    else:
+    
+    command = TESSERACT_INSTALL_COMMANDS.get(system)
+    if command is None:
         print(f"❌ Unsupported operating system: {system}")
         return False
+    return run_command(command, "Installing Tesseract OCR")
 
 def create_directories():
     """Create necessary directories"""
     directories = [
-        "static/receipts",
+        "receipts",
+        "cache/ocr",
         "static/uploads",
         "logs"
     ]
     
+    messages = []
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
-        print(f"✅ Created directory: {directory}")
+        if os.path.isdir(directory):
+            messages.append(f"✅ Directory already exists: {directory}")
+        else:
+            os.makedirs(directory, exist_ok=True)
+            messages.append(f"✅ Created directory: {directory}")
+    
+    # Report every directory with a single write instead of a print each
+    sys.stdout.write("\n".join(messages) + "\n")
 
 def setup_database():
     """Initialize the database"""
@@ -81,7 +156,7 @@ def main():
         sys.exit(1)
     
     # Install Python dependencies
-    if not run_command("pip install -r requirements.txt", "Installing Python dependencies"):
+    if not install_dependencies():
         print("❌ Failed to install Python dependencies!")
         sys.exit(1)
     
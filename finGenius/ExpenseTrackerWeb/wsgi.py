@@ -0,0 +1,8 @@
+"""
+WSGI entry point for production servers
+
+Run with:
+    gunicorn --workers 1 --worker-class gthread --threads 8 --bind 0.0.0.0:5000 wsgi:app
+"""
+
+from app import app
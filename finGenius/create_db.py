@@ -1,14 +1,60 @@
+import atexit
+import csv
 import sqlite3
 from datetime import date
 import os
+import sys
 import traceback
 
 DB_FILE = "expenses.db"
 
+# full tracebacks on errors only when FINGENIUS_DEBUG=1
+DEBUG = os.environ.get("FINGENIUS_DEBUG") == "1"
+
+# explicitly specify columns to avoid schema/order mismatch; kept as one
+# string so the connection's statement cache compiles it only once
+INSERT_SQL = "INSERT INTO expenses (date, category, description, amount) VALUES (?, ?, ?, ?)"
+
+# set once the table exists, so create_table() is free to call again
+_table_ready = False
+# shared by every menu action; opened on first use
+_conn = None
+# PRAGMA table_info rows, kept until the DB is reset
+_schema_cache = None
+
+def connect():
+    """Open a connection with the per-connection PRAGMAs applied"""
+    conn = sqlite3.connect(DB_FILE)
+    # WAL (set in create_table) only needs a sync at checkpoints
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+def get_connection():
+    """Return the shared connection, opening it on first use"""
+    global _conn
+    if _conn is None:
+        _conn = connect()
+    return _conn
+
+def close_connection():
+    global _conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+
+atexit.register(close_connection)
+
 def create_table():
+    global _table_ready
+    if _table_ready:
+        return
     try:
-        with sqlite3.connect(DB_FILE) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
+            # journal mode is stored in the database file, so set it once here
+            cur.execute("PRAGMA journal_mode=WAL")
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS expenses (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,27 +64,39 @@ def create_table():
                     amount REAL NOT NULL
                 )
             """)
+            # for listing/filtering by date range or by category
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(category)")
             conn.commit()
+        _table_ready = True
     except Exception as e:
         print("Error creating table:", e)
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
 
 def show_table_schema():
+    global _schema_cache
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cur = conn.cursor()
-            cur.execute("PRAGMA table_info(expenses)")
-            cols = cur.fetchall()
-            if not cols:
-                print("Table 'expenses' does not exist or has no columns.")
-            else:
-                print("\nexpenses table schema:")
-                print("cid | name | type | notnull | dflt_value | pk")
-                for c in cols:
-                    print(c)
+        cols = _schema_cache
+        if cols is None:
+            with get_connection() as conn:
+                cur = conn.cursor()
+                cur.execute("PRAGMA table_info(expenses)")
+                cols = cur.fetchall()
+            # a missing table may still be created, so only cache a real schema
+            if cols:
+                _schema_cache = cols
+        if not cols:
+            print("Table 'expenses' does not exist or has no columns.")
+        else:
+            print("\nexpenses table schema:")
+            print("cid | name | type | notnull | dflt_value | pk")
+            for c in cols:
+                print(c)
     except Exception as e:
         print("Error reading schema:", e)
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
 
 def add_expense(date_str, category, description, amount):
     # validate amount
@@ -48,39 +106,69 @@ def add_expense(date_str, category, description, amount):
         raise ValueError("Amount must be a number (e.g., 250 or 250.50).")
 
     try:
-        with sqlite3.connect(DB_FILE) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            # explicitly specify columns to avoid schema/order mismatch
-            cur.execute(
-                "INSERT INTO expenses (date, category, description, amount) VALUES (?, ?, ?, ?)",
-                (date_str, category, description, amount)
-            )
+            cur.execute(INSERT_SQL, (date_str, category, description, amount))
             conn.commit()
             print("✅ Expense added.")
     except sqlite3.OperationalError as e:
         print("SQLite OperationalError:", e)
         print("Tip: run option 3 (Show schema) from the menu to inspect the table. If schema is wrong, use option 4 to reset DB.")
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
     except Exception as e:
         print("Error adding expense:", e)
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
+
+def add_expenses_bulk(rows):
+    """Insert (date, category, description, amount) rows in one transaction. Returns the row count."""
+    # validate every amount before writing anything
+    try:
+        rows = [(d, cat, desc, float(amt)) for d, cat, desc, amt in rows]
+    except (TypeError, ValueError):
+        raise ValueError("Amount must be a number (e.g., 250 or 250.50).")
+
+    with get_connection() as conn:
+        conn.executemany(INSERT_SQL, rows)
+    return len(rows)
 
 def view_expenses():
     try:
-        with sqlite3.connect(DB_FILE) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM expenses")
-            rows = cur.fetchall()
+            cur.execute("SELECT id, date, category, description, amount FROM expenses")
+            rows = cur.fetchmany(1000)
             if not rows:
                 print("\nNo expenses found. Add one (menu option 1).")
                 return
             print("\nID | Date       | Category    | Description           | Amount")
             print("-" * 70)
-            for r in rows:
-                print(r)
+            # stream in chunks, writing each chunk to stdout at once
+            while rows:
+                sys.stdout.write("\n".join(
+                    f"{r[0]} | {r[1]:<10} | {r[2]:<11} | {r[3] or '':<21} | {r[4]}" for r in rows
+                ) + "\n")
+                rows = cur.fetchmany(1000)
     except Exception as e:
         print("Error reading expenses:", e)
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
+
+def delete_db():
+    """Delete the DB file along with its WAL files. Returns False if there was no DB file."""
+    global _table_ready, _schema_cache
+    _table_ready = False
+    _schema_cache = None
+    # the file must not stay open while it is deleted
+    close_connection()
+    if not os.path.exists(DB_FILE):
+        return False
+    # a leftover -wal file would be replayed into the next database
+    for path in (DB_FILE, DB_FILE + "-wal", DB_FILE + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    return True
 
 def add_expense_interactive():
     print("\nAdd new expense (leave date empty for today):")
@@ -95,16 +183,62 @@ def add_expense_interactive():
     except Exception as e:
         print("Failed to add expense:", e)
 
+def bulk_add_interactive():
+    print("\nBulk add mode: enter expenses one after another, they are saved together at the end.")
+    rows = []
+    while True:
+        amt = input("\nAmount (leave empty to finish): ").strip()
+        if not amt:
+            break
+        try:
+            amount = float(amt)
+        except ValueError:
+            print("Amount must be a number (e.g., 250 or 250.50).")
+            continue
+        d = input("Date (YYYY-MM-DD, empty for today): ").strip() or date.today().isoformat()
+        cat = input("Category: ").strip() or "Other"
+        desc = input("Description: ").strip()
+        # already a float, so add_expenses_bulk won't parse it again
+        rows.append((d, cat, desc, amount))
+
+    if not rows:
+        print("Nothing to add.")
+        return
+    try:
+        count = add_expenses_bulk(rows)
+        print(f"✅ Added {count} expenses.")
+    except Exception as e:
+        print("Failed to add expenses:", e)
+
+def import_csv_interactive():
+    print("\nBulk import from CSV (header row: date,category,description,amount):")
+    path = input("CSV file path: ").strip()
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [
+                (r["date"], r["category"] or "Other", r.get("description") or "", r["amount"])
+                for r in csv.DictReader(f)
+            ]
+        count = add_expenses_bulk(rows)
+        print(f"✅ Imported {count} expenses.")
+    except KeyError as e:
+        print("CSV is missing column:", e)
+    except Exception as e:
+        print("Failed to import CSV:", e)
+
 def main_menu():
-    create_table()
     while True:
+        # no-op unless the table still has to be (re)created
+        create_table()
         print("\n--- Expense Tracker Menu ---")
         print("1. Add Expense")
         print("2. View Expenses")
         print("3. Show DB Table Schema (debug)")
         print("4. Reset DB (delete expenses.db) — irreversible")
-        print("5. Exit")
-        choice = input("Enter choice (1-5): ").strip()
+        print("5. Bulk Import Expenses from CSV")
+        print("6. Bulk Add Expenses")
+        print("7. Exit")
+        choice = input("Enter choice (1-7): ").strip()
 
         if choice == "1":
             add_expense_interactive()
@@ -116,8 +250,7 @@ def main_menu():
             confirm = input("Type YES (uppercase) to delete the DB file: ")
             if confirm == "YES":
                 try:
-                    if os.path.exists(DB_FILE):
-                        os.remove(DB_FILE)
+                    if delete_db():
                         print("DB file deleted. Table will be recreated on next action.")
                     else:
                         print("No DB file found to delete.")
@@ -126,6 +259,10 @@ def main_menu():
             else:
                 print("Canceled.")
         elif choice == "5":
+            import_csv_interactive()
+        elif choice == "6":
+            bulk_add_interactive()
+        elif choice == "7":
             print("Goodbye 👋")
             break
         else: